@@ -1,245 +1,543 @@
 import pygame
 import random
 import math
-import noise
-from settings import GRID_WIDTH, GRID_HEIGHT, TILE_SIZE, MAP_HEIGHT, MAP_WIDTH, SCREEN_HEIGHT, SCREEN_WIDTH, BLACK, WHITE, RED ,GREEN ,GRAY , YELLOW
+import numpy as np
+from settings import TILE_SIZE, GRID_WIDTH, GRID_HEIGHT, MAP_HEIGHT, MAP_WIDTH, SCREEN_HEIGHT, SCREEN_WIDTH, BLACK, WHITE, RED
+from settings import FLASHBANG_NOISE, TRAP_NOISE
 from game_states import GameState, ResourceType
 from player import Player
 from safe_zone import SafeZone
 from zombie import Zombie
+from swarm import ZombieSwarm
+from spatial_hash import SpatialHash
 from obstacle import Resource, Obstacle
 from trap import Trap
-import sys
+from pool import Pool
+from flow_field import FlowField
+from ai_scheduler import AIScheduler
+from collision import CollisionWorld
+from occupancy import OccupancyGrid
+from world import ChunkedWorld
+from camera import Camera
+from terrain import TerrainGenerator, TILE_EMPTY, OBSTACLE_TYPES
+from asset_manager import assets, GAME_SPRITES
+from audio import AudioManager, distance_volume
+from inputs import InputState
+from noise_field import NoiseField
+from profiler import FrameProfiler, StartupTimer
+from hud import Hud
+from menu import Menu
+from weather import WeatherEffects
+from recording import Recording
+from worldgen import WorldSpec, WorldPregenerator, difficulty_counts, spawn_counts
+import hashlib
+from collections import deque
+import os
+import time
 
 
-pygame.init()
-pygame.mixer.init()
-
-
-# Create screen
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Zombie Escape")
-clock = pygame.time.Clock()
-
-# Load sounds
-try:
-    heartbeat_sound = pygame.mixer.Sound("assets/heartbeat.wav")
-    zombie_growl = pygame.mixer.Sound("assets/zombie_growl.mp3")
-    pickup_sound = pygame.mixer.Sound("assets/pickup.mp3")
-    # Use placeholder sounds if files are missing
-except:
-    heartbeat_sound = pygame.mixer.Sound(pygame.mixer.Sound.get_length())
-    zombie_growl = pygame.mixer.Sound(pygame.mixer.Sound.get_length())
-    pickup_sound = pygame.mixer.Sound(pygame.mixer.Sound.get_length())
-
-# Font
-font = pygame.font.SysFont(None, 36)
-small_font = pygame.font.SysFont(None, 24)
+# Menu screens: background, title, title color and y, buttons (action, label), y of the first button
+MENU_SCREENS = {
+    GameState.MAIN_MENU: ((20, 20, 30), "ZOMBIE ESCAPE", RED, 100,
+                          [("play", "PLAY"), ("settings", "SETTINGS"), ("quit", "QUIT")], 250),
+    GameState.SETTINGS: ((20, 20, 30), "SETTINGS", WHITE, 100,
+                         [("easy", "EASY"), ("normal", "NORMAL"), ("hard", "HARD"), ("back", "BACK")], 250),
+    GameState.GAME_OVER: ((50, 0, 0), "GAME OVER", WHITE, 200,
+                          [("play", "RESTART"), ("menu", "MAIN MENU"), ("quit", "QUIT")], 300),
+    GameState.WIN: ((0, 50, 0), "YOU SURVIVED!", WHITE, 200,
+                    [("play", "PLAY AGAIN"), ("menu", "MAIN MENU"), ("quit", "QUIT")], 300),
+}
 
 
 class Game:
-    def __init__(self, difficulty="normal"):
+    def __init__(self, difficulty="normal", headless=False, audio=True, map_size=(MAP_WIDTH, MAP_HEIGHT),
+                 world_size=None, seed=None, startup=None):
         self.state = GameState.MAIN_MENU
-        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+        # Timings of the cold start (main.py --startup-report)
+        self.startup = startup if startup is not None else StartupTimer()
+        # Every game draws its own seed from this stream, so a seeded Game gives the
+        # same sequence of maps. The simulation only ever uses self.rng; the weather
+        # particles have their own generator so rendering can't change the outcome.
+        self.seed_rng = random.Random(seed)
+        self.seed = None
+        self.rng = random.Random()
+        self.weather_effects = WeatherEffects()
+        # Set record_path to save each session's inputs for replay.py: the first
+        # session to record_path itself, later ones to PATH-2, PATH-3, ... beside it
+        self.record_path = None
+        self.recorder = None
+        self.sessions_recorded = 0
+        # A world_size (in pixels) turns on the scrolling, chunk-streamed world
+        self.streaming = world_size is not None
+        if self.streaming:
+            self.map_width, self.map_height = world_size
+            self.terrain_width = self.map_width // TILE_SIZE
+        else:
+            self.map_width, self.map_height = map_size
+            # Noise stays normalised to the full screen width (as when the grid ran
+            # under the UI panel) so maps keep their look; only the map is generated
+            self.terrain_width = (self.map_width + SCREEN_WIDTH - MAP_WIDTH) // TILE_SIZE
+        self.grid_width = self.map_width // TILE_SIZE
+        self.grid_height = self.map_height // TILE_SIZE
+        self.grid = OccupancyGrid.empty(self.grid_width, self.grid_height)
+        self.world_spec = WorldSpec((self.map_width, self.map_height), self.terrain_width)
+        # Seeds drawn ahead from seed_rng so their worlds can be planned early
+        self.upcoming_seeds = deque()
+        self.pregenerator = None
+        self.world = None
+        self.camera = None
+        # Parked entities of unloaded chunks as (x, y, type) records, by chunk
+        self.dormant = {}
+        self.populated_chunks = set()
+        self.terrain = None
         self.player = None
         self.zombies = []
+        self.swarm = ZombieSwarm()
+        # Zombie proximity queries (traps, flashbang, contact, danger icon)
+        self.broadphase = SpatialHash()
         self.obstacles = []
         self.resources = []
         self.safe_zone = None
         self.traps = []
+        # Spare entities from earlier games and removed items, reused before allocating
+        self.zombie_pool = Pool(Zombie)
+        self.obstacle_pool = Pool(Obstacle)
+        self.resource_pool = Pool(Resource)
+        self.trap_pool = Pool(Trap)
         self.difficulty = difficulty
-        self.time_elapsed = 0
-        self.noise_level = 0
+        # Override the difficulty's zombie / resource counts when set
+        self.zombie_count = None
+        self.resource_count = None
+        self.time_elapsed = 0  # Simulation ticks this game
+        self.frame_count = 0  # Rendered frames, drives the menu animations
+        # How loud it is in each cell of the grid; zombies listen to their own cell
+        self.noise = NoiseField()
         self.weather = "clear"
         self.weather_timer = 0
         self.weather_duration = 600  # 10 seconds at 60 FPS
         self.fog_intensity = 0
+        # Shared distance field to the player used by every chasing zombie
+        self.use_flow_field = True
+        self.flow_field = FlowField()
+        # Spreads zombie decisions over ticks within a per-tick time budget
+        self.ai_scheduler = AIScheduler()
+        # Budget for games that aren't recorded; None for deterministic runs (batch, replay)
+        self.ai_budget_ms = self.ai_scheduler.budget_ms
+        self.collision_world = CollisionWorld(self.grid)
+        # Pre-rendered obstacles and safe zone, plus dirty-rect bookkeeping
+        self.background = None
+        self.full_redraw = True
+        self.prev_dirty_rects = []
+        self.drawn_resources = []
+        # Fraction of a tick the display lags the simulation, for interpolation
+        self.alpha = 1.0
+        self.player_prev_pos = (0, 0)
+        # Per-subsystem frame timings, toggled with F3
+        self.profiler = FrameProfiler()
+        
+        # Rendering and audio only exist when there is a window
+        self.headless = headless
+        self.screen = None
+        self.font = None
+        self.small_font = None
+        self.hud = None
+        self.title_font = None
+        self.menus = {}  # Menu screens by state, each laid out the first time it is shown
+        self.menu_shown = None  # (state, highlighted button) of the menu on screen
+        self.menu_zombie_rects = []
+        self.audio = None
+        if headless:
+            # Nothing opens a window or an audio device in headless runs
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        else:
+            self.init_display()
+            if audio:
+                self.init_audio()
     
-    def init_game(self):
-        # Clear previous game objects
-        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.zombies = []
-        self.obstacles = []
-        self.resources = []
-        self.traps = []
-        self.time_elapsed = 0
+    def init_display(self):
+        # Only what the main menu needs is set up here; the mixer is started by
+        # init_audio and the sprites are decoded while the menu is up
+        pygame.display.init()
+        pygame.font.init()
+        
+        # Create screen
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Zombie Escape")
+        self.startup.mark("display")
+        
+        # Font (the default font, without SysFont's scan of the system fonts)
+        self.font = pygame.font.Font(None, 36)
+        self.small_font = pygame.font.Font(None, 24)
+        self.title_font = pygame.font.Font(None, 72)
+        self.hud = Hud(self.font, self.small_font)
+        self.startup.mark("fonts")
+        
+        # Decode every sprite in the background; prepare_sprites packs them
+        # into a single atlas before the first game is drawn
+        assets.decode_async(GAME_SPRITES)
+    
+    def prepare_sprites(self, wait=True):
+        # Builds the sprite atlas once. Menu frames call it with wait=False so
+        # it only happens there once the background decode has finished.
+        if assets.atlas is not None or (not wait and assets.decoding()):
+            return
+        start = time.perf_counter()
+        assets.build_atlas(GAME_SPRITES)
+        if assets.decode_seconds is not None:
+            self.startup.record("sprite decode", assets.decode_seconds)
+        self.startup.record("sprite atlas", time.perf_counter() - start)
+    
+    def init_audio(self):
+        # Opening the audio device and loading the sounds happen on a thread of
+        # their own; sounds asked for before they are loaded are skipped
+        self.audio = AudioManager()
+        self.audio.start(self.startup)
+    
+    def play_sound(self, name, source=None):
+        # A source position (in pixels) makes the sound fade with its distance
+        # from the player. The sound starts when the frame is presented.
+        if self.audio is None:
+            return
+        volume = 1.0 if source is None else distance_volume(source, self.player.rect.center)
+        self.audio.play(name, volume)
+    
+    def init_game(self, seed=None):
+        # The sprites have usually been packed while the main menu was up
+        if not self.headless:
+            self.prepare_sprites()
+        
+        # Seed this game's random streams (replays pass the recorded seed)
+        self.seed = seed if seed is not None else self.next_seed()
+        self.rng = random.Random(self.seed)
+        self.weather_effects = WeatherEffects(self.seed + 1)
+        self.ai_scheduler.reset()
+        if self.record_path:
+            # A wall-clock budget would make the recording impossible to replay
+            self.ai_scheduler.budget_ms = None
+            self.recorder = Recording.for_game(self)
+            self.sessions_recorded += 1
+        else:
+            self.ai_scheduler.budget_ms = self.ai_budget_ms
         
-        # Generate map with Perlin noise
-        self.generate_map()
+        # Clear previous game objects, keeping them in the pools for this one
+        self.release_entities()
+        self.grid = OccupancyGrid.empty(self.grid_width, self.grid_height)
+        self.swarm = ZombieSwarm()
+        self.time_elapsed = 0
+        # Noise from the last game (a flashbang, say) must not carry over
+        self.noise.reset()
         
-        # Create player at random position where there's no obstacle
-        player_pos = self.find_empty_position()
-        self.player = Player(player_pos[0] * TILE_SIZE, player_pos[1] * TILE_SIZE)
+        # Start with clear weather
+        self.weather = "clear"
+        self.fog_intensity = 0
+        self.weather_timer = self.weather_duration
         
-        # Create safe zone at a position far from player
-        safe_pos = self.find_position_far_from_player()
-        self.safe_zone = SafeZone(safe_pos[0] * TILE_SIZE, safe_pos[1] * TILE_SIZE, 
+        if self.streaming:
+            self.init_world()
+            return
+        
+        # Swap in the world planned in the background, or plan it now
+        num_zombies, num_resources = difficulty_counts(self.difficulty, self.zombie_count, self.resource_count)
+        plan = None
+        if self.pregenerator:
+            plan = self.pregenerator.take(self.seed, num_zombies, num_resources)
+        if plan is None:
+            plan = self.world_spec.plan(self.seed, num_zombies, num_resources)
+        self.apply_plan(plan)
+        self.pregenerate_worlds()
+    
+    def apply_plan(self, plan):
+        # Builds the planned world's entities; the plan's random stream carries on as the game's
+        self.rng = plan.rng
+        self.terrain = plan.terrain
+        self.grid = plan.grid
+        self.add_obstacles(plan.tiles)
+        self.collision_world = CollisionWorld(self.grid)
+        
+        self.player = Player(plan.player_pos[0] * TILE_SIZE, plan.player_pos[1] * TILE_SIZE,
+                             (self.map_width, self.map_height))
+        self.player_prev_pos = self.player.rect.topleft
+        self.safe_zone = SafeZone(plan.safe_pos[0] * TILE_SIZE, plan.safe_pos[1] * TILE_SIZE,
                                   TILE_SIZE * 2, TILE_SIZE * 2)
         
-        # Create zombies based on difficulty
-        num_zombies = 5 if self.difficulty == "easy" else (10 if self.difficulty == "normal" else 15)
-        for _ in range(num_zombies):
-            zombie_pos = self.find_empty_position(min_dist_from_player=200)
-            zombie_type = random.choice(["normal", "normal", "markov"])  # 2/3 normal, 1/3 markov
-            self.zombies.append(Zombie(zombie_pos[0] * TILE_SIZE, zombie_pos[1] * TILE_SIZE, zombie_type))
+        for x, y, zombie_type in plan.zombies:
+            self.zombies.append(self.zombie_pool.acquire(x, y, zombie_type, self.swarm, self.rng))
+        for x, y, resource_type in plan.resources:
+            self.resources.append(self.resource_pool.acquire(x, y, resource_type))
         
-        # Create resources
-        num_resources = 15 if self.difficulty == "easy" else (10 if self.difficulty == "normal" else 7)
-        for _ in range(num_resources):
-            resource_pos = self.find_empty_position()
-            resource_type = random.choice(list(ResourceType))
-            self.resources.append(Resource(resource_pos[0] * TILE_SIZE, resource_pos[1] * TILE_SIZE, resource_type))
+        self.update_broadphase()
         
-        # Start with clear weather
-        self.weather = "clear"
-        self.fog_intensity = 0
-        self.weather_timer = self.weather_duration
+        # The map never changes after generation; it is rendered once on the next draw
+        self.background = None
     
-    def generate_map(self):
-        # Generate obstacles using Perlin noise
-        scale = 15.0
-        octaves = 6
-        persistence = 0.5
-        lacunarity = 2.0
-        seed = random.randint(0, 1000)
-        
-        for y in range(GRID_HEIGHT):
-            for x in range(GRID_WIDTH):
-                # Generate Perlin noise value
-                nx = x / GRID_WIDTH - 0.5
-                ny = y / GRID_HEIGHT - 0.5
-                value = noise.pnoise2(nx * scale, ny * scale, 
-                                     octaves=octaves, 
-                                     persistence=persistence, 
-                                     lacunarity=lacunarity, 
-                                     repeatx=1024, 
-                                     repeaty=1024, 
-                                     base=seed)
-                
-                # Create obstacles based on noise value
-                if value > 0.2:  # Wall
-                    self.grid[y][x] = 1
-                    obstacle_type = "wall"
-                    if value > 0.3:  # Tree
-                        obstacle_type = "tree"
-                    self.obstacles.append(Obstacle(x * TILE_SIZE, y * TILE_SIZE, 
-                                                TILE_SIZE, TILE_SIZE, obstacle_type))
-                
-                # Add some random fences
-                elif random.random() < 0.02:
-                    self.grid[y][x] = 1
-                    self.obstacles.append(Obstacle(x * TILE_SIZE, y * TILE_SIZE, 
-                                                TILE_SIZE, TILE_SIZE, "fence"))
-    
-    def find_empty_position(self, min_dist_from_player=0):
-        while True:
-            x = random.randint(0, GRID_WIDTH - 1)
-            y = random.randint(0, GRID_HEIGHT - 1)
-            
-            # Check if position is empty (no obstacles)
-            if self.grid[y][x] == 0:
-                # If player exists and min_dist is specified, check distance
-                if self.player and min_dist_from_player > 0:
-                    player_x, player_y = self.player.get_grid_pos()
-                    dist = math.sqrt((x - player_x)**2 + (y - player_y)**2) * TILE_SIZE
-                    if dist < min_dist_from_player:
-                        continue
-                
-                return (x, y)
+    def next_seed(self):
+        if self.upcoming_seeds:
+            return self.upcoming_seeds.popleft()
+        return self.seed_rng.randrange(2 ** 32)
+    
+    def start_pregenerator(self, depth=2):
+        # Plan the next few classic worlds on a background thread from now on
+        if self.streaming or self.pregenerator:
+            return
+        self.pregenerator = WorldPregenerator(self.world_spec, depth)
+        self.pregenerate_worlds()
     
-    def find_position_far_from_player(self):
+    def pregenerate_worlds(self):
+        # Keeps the pregenerator's window of upcoming seeds full, every difficulty included
+        if not self.pregenerator:
+            return
+        counts = spawn_counts(self.zombie_count, self.resource_count)
+        while len(self.upcoming_seeds) < self.pregenerator.depth:
+            seed = self.seed_rng.randrange(2 ** 32)
+            self.upcoming_seeds.append(seed)
+            self.pregenerator.request(seed, counts)
+    
+    def release_entities(self):
+        # Hand every zombie, obstacle, resource and trap back to its pool
+        self.zombie_pool.release_all(self.zombies)
+        self.obstacle_pool.release_all(self.obstacles)
+        self.resource_pool.release_all(self.resources)
+        self.trap_pool.release_all(self.traps)
+        self.zombies = []
+        self.obstacles = []
+        self.resources = []
+        self.traps = []
+        # Queued zombies would otherwise outlive their game
+        self.ai_scheduler.carry_over = []
+    
+    def init_world(self):
+        # Terrain is normalised to the classic grid so features keep their size
+        seed = self.rng.randint(0, 1000)
+        self.terrain = TerrainGenerator(seed, GRID_WIDTH, GRID_HEIGHT)
+        self.world = ChunkedWorld(self.terrain, self.grid_width, self.grid_height)
+        self.collision_world = self.world
+        self.camera = Camera(MAP_WIDTH, MAP_HEIGHT, self.map_width, self.map_height)
+        self.dormant = {}
+        self.populated_chunks = set()
+        
+        # Player starts on open ground near the middle of the world
+        start = self.find_open_cell(self.grid_width // 2, self.grid_height // 2)
+        self.player = Player(start[0] * TILE_SIZE, start[1] * TILE_SIZE,
+                             (self.map_width, self.map_height))
+        self.player_prev_pos = self.player.rect.topleft
+        
+        # Safe zone a long walk away in a random direction, with its cells cleared
+        angle = self.rng.uniform(0, 2 * math.pi)
+        reach = 0.4 * min(self.grid_width, self.grid_height)
+        safe_x = min(max(int(start[0] + math.cos(angle) * reach), 3), self.grid_width - 5)
+        safe_y = min(max(int(start[1] + math.sin(angle) * reach), 3), self.grid_height - 5)
+        self.world.clear([(safe_x, safe_y), (safe_x + 1, safe_y),
+                          (safe_x, safe_y + 1), (safe_x + 1, safe_y + 1)])
+        self.safe_zone = SafeZone(safe_x * TILE_SIZE, safe_y * TILE_SIZE,
+                                  TILE_SIZE * 2, TILE_SIZE * 2)
+        
+        self.stream_world()
+    
+    def find_open_cell(self, x, y):
+        # Nearest open cell to (x, y), searching outwards ring by ring
+        for radius in range(max(self.grid_width, self.grid_height)):
+            for cy in range(y - radius, y + radius + 1):
+                for cx in range(x - radius, x + radius + 1):
+                    if max(abs(cx - x), abs(cy - y)) == radius and self.world.tile(cx, cy) == TILE_EMPTY:
+                        return (cx, cy)
+        return (x, y)
+    
+    def populate_chunk(self, key):
+        # Seeded per chunk, so its contents don't depend on the route taken to reach it.
+        # Densities match the classic map: the difficulty's counts per screen of cells.
+        rng = random.Random(f"{self.terrain.seed}:{key[0]}:{key[1]}")
+        cells = self.world.free_cells(key)
+        # Zombies may already have wandered in before the chunk was first loaded
+        records = self.dormant.setdefault(key, {"zombies": [], "resources": []})
+        if not cells:
+            return
+        
+        num_zombies, num_resources = difficulty_counts(self.difficulty, self.zombie_count, self.resource_count)
+        chunk_cells = self.world.chunk_size * self.world.chunk_size
+        screen_cells = GRID_WIDTH * GRID_HEIGHT
+        
         player_x, player_y = self.player.get_grid_pos()
-        max_dist = 0
-        best_pos = None
-
-        # Define safe zone boundaries (3 tiles inside the border)
-        min_x, min_y = 3, 3
-        max_x = (MAP_WIDTH // TILE_SIZE) - 3
-        max_y = (MAP_HEIGHT // TILE_SIZE) - 3
-
-        # Try several random positions and pick the farthest one
-        for _ in range(50):
-            pos = self.find_empty_position()
-
-            # Ensure the position is at least 3 tiles inside all borders
-            if min_x <= pos[0] <= max_x and min_y <= pos[1] <= max_y:
-                dist = math.sqrt((pos[0] - player_x) ** 2 + (pos[1] - player_y) ** 2)
-                if dist > max_dist:
-                    max_dist = dist
-                    best_pos = pos
-
-        # Fallback: If no position is found, place it at the center
-        if best_pos is None:
-            best_pos = ((max_x + min_x) // 2, (max_y + min_y) // 2)
-
-        return best_pos
-
-
-
+        for _ in range(int(num_zombies * chunk_cells / screen_cells + rng.random())):
+            x, y = rng.choice(cells)
+            zombie_type = rng.choice(["normal", "normal", "markov"])
+            # Nothing spawns on top of the player
+            if math.sqrt((x - player_x) ** 2 + (y - player_y) ** 2) * TILE_SIZE < 200:
+                continue
+            records["zombies"].append((x * TILE_SIZE, y * TILE_SIZE, zombie_type))
+        for _ in range(int(num_resources * chunk_cells / screen_cells + rng.random())):
+            x, y = rng.choice(cells)
+            records["resources"].append((x * TILE_SIZE, y * TILE_SIZE, rng.choice(list(ResourceType))))
+    
+    def stream_world(self):
+        # Load chunks around the player and park everything that ended up outside them
+        loaded, unloaded = self.world.stream(self.player.get_grid_pos())
+        if not loaded and not unloaded:
+            return
+        self.grid = self.world.window
+        
+        if unloaded:
+            zombies = []
+            for zombie in self.zombies:
+                key = self.world.chunk_of(zombie.get_grid_pos())
+                if key in self.world.loaded:
+                    zombies.append(zombie)
+                else:
+                    self.dormant.setdefault(key, {"zombies": [], "resources": []})["zombies"].append(
+                        (zombie.rect.x, zombie.rect.y, zombie.type))
+                    self.zombie_pool.release(zombie)
+            self.zombies = zombies
+            self.swarm.retain(zombies)
+            
+            resources = []
+            for resource in self.resources:
+                key = self.world.chunk_of((resource.rect.x // TILE_SIZE, resource.rect.y // TILE_SIZE))
+                if key in self.world.loaded:
+                    resources.append(resource)
+                else:
+                    self.dormant.setdefault(key, {"zombies": [], "resources": []})["resources"].append(
+                        (resource.rect.x, resource.rect.y, resource.type))
+                    self.resource_pool.release(resource)
+            self.resources = resources
+        
+        # Wake up whatever was parked in the chunks that just loaded
+        for key in loaded:
+            if key not in self.populated_chunks:
+                self.populated_chunks.add(key)
+                self.populate_chunk(key)
+            records = self.dormant.pop(key, None)
+            if records is None:
+                continue
+            for x, y, zombie_type in records["zombies"]:
+                self.zombies.append(self.zombie_pool.acquire(x, y, zombie_type, self.swarm, self.rng))
+            for x, y, resource_type in records["resources"]:
+                self.resources.append(self.resource_pool.acquire(x, y, resource_type))
+        self.update_broadphase()
+    
+    def update_broadphase(self):
+        # Re-index the zombies; called whenever they moved or the swarm changed
+        self.broadphase.build(self.swarm.positions[:self.swarm.count])
+    
+    def build_static_layer(self):
+        self.background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        self.background.fill(BLACK)
+        for obstacle in self.obstacles:
+            obstacle.draw(self.background)
+        self.safe_zone.draw(self.background)
+        
+        self.full_redraw = True
+        self.prev_dirty_rects = []
+        self.drawn_resources = []
+    
+    def add_obstacles(self, tiles):
+        ys, xs = np.nonzero(tiles)
+        for x, y, tile in zip(xs.tolist(), ys.tolist(), tiles[ys, xs].tolist()):
+            self.obstacles.append(self.obstacle_pool.acquire(x * TILE_SIZE, y * TILE_SIZE,
+                                                             TILE_SIZE, TILE_SIZE, OBSTACLE_TYPES[tile]))
     
     def update_game(self):
+        # Process keyboard input
+        inputs = InputState.from_keys(pygame.key.get_pressed())
+        if self.recorder:
+            self.recorder.record(inputs)
+        state = self.step(inputs)
+        if state != GameState.PLAYING:
+            self.save_recording()
+        return state
+    
+    def save_recording(self):
+        # Writes the session being recorded, if any, along with its final state.
+        # Returns the path it was written to, or None.
+        if self.recorder is None:
+            return None
+        path = self.record_path
+        if self.sessions_recorded > 1:
+            root, ext = os.path.splitext(path)
+            path = f"{root}-{self.sessions_recorded}{ext}"
+        self.recorder.digest = self.state_digest()
+        self.recorder.save(path)
+        self.recorder = None
+        return path
+    
+    def state_digest(self):
+        # md5 of everything the simulation carries from tick to tick
+        n = self.swarm.count
+        state = (
+            self.state, self.seed, self.weather, self.weather_timer, self.fog_intensity,
+            self.player.rect, self.player.health, self.player.stamina, self.player.sprinting,
+            self.player.last_noise_level, self.player.noise_cooldown,
+            sorted((res_type.value, count) for res_type, count in self.player.inventory.items()),
+            [(zombie.rect, zombie.idle_direction, zombie.markov_direction, zombie.idle_counter,
+              zombie.flow_target, zombie.path) for zombie in self.zombies],
+            [(resource.rect, resource.type) for resource in self.resources],
+            [(trap.rect, trap.activated, trap.duration) for trap in self.traps],
+            self.rng.getstate(),
+        )
+        digest = hashlib.md5(repr(state).encode())
+        for array in (self.swarm.positions, self.swarm.states, self.swarm.stun_timers):
+            digest.update(array[:n].tobytes())
+        digest.update(self.noise.levels.tobytes())
+        return digest.digest()
+    
+    def step(self, inputs):
+        # Advance the simulation by one tick; never touches the display or keyboard
+        prof = self.profiler if self.profiler.enabled else None
+        if prof:
+            prof.begin()
+        
         # Update timer
         self.time_elapsed += 1
+        # The noise field follows the grid (a new map or a moved window)
+        self.noise.track(self.grid)
+        self.player_prev_pos = self.player.rect.topleft
         
-        # Process keyboard input
-        # Process keyboard input
-        keys = pygame.key.get_pressed()
-        dx, dy = 0, 0
-
-# Movement with W, A, S, D or Arrow Keys
-        if keys[pygame.K_w] or keys[pygame.K_UP]:
-            dy = -self.player.speed
-        if keys[pygame.K_s] or keys[pygame.K_DOWN]:
-            dy = self.player.speed
-        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
-            dx = -self.player.speed
-        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
-            dx = self.player.speed
-
-# Sprint with Shift key
-        if (keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]) and self.player.stamina > 0:
+        dx = inputs.dx * self.player.speed
+        dy = inputs.dy * self.player.speed
+        
+        # Sprint while stamina lasts
+        if inputs.sprint and self.player.stamina > 0:
             self.player.sprinting = True
         else:
             self.player.sprinting = False
-
         
-        # Use items with number keys
-        if keys[pygame.K_1]:
+        # Use items
+        if ResourceType.FOOD in inputs.use_items:
             if self.player.use_item(ResourceType.FOOD):
                 self.player.restore_stamina(30)
-        if keys[pygame.K_2]:
+        if ResourceType.WATER in inputs.use_items:
             if self.player.use_item(ResourceType.WATER):
                 self.player.restore_stamina(20)
-        if keys[pygame.K_3]:
+        if ResourceType.MEDKIT in inputs.use_items:
             if self.player.use_item(ResourceType.MEDKIT):
                 self.player.heal(50)
-        if keys[pygame.K_4]:
+        if ResourceType.FLASHBANG in inputs.use_items:
             if self.player.use_item(ResourceType.FLASHBANG):
-                # Stun all zombies within radius
-                for zombie in self.zombies:
-                    dist = math.sqrt((zombie.rect.centerx - self.player.rect.centerx)**2 + 
-                                   (zombie.rect.centery - self.player.rect.centery)**2)
-                    if dist < 200:  # Flashbang radius
-                        zombie.stun(180)  # 3 seconds at 60 FPS
-                self.noise_level = 50  # Create loud noise
-        if keys[pygame.K_5]:
+                # Stun all zombies within the 200px flashbang radius for 3 seconds at 60 FPS
+                self.swarm.stun_timers[self.broadphase.query_radius(self.player.rect.center, 200)] = 180
+                self.noise.emit(self.player.rect.center, FLASHBANG_NOISE)  # Create loud noise
+        if ResourceType.TRAP in inputs.use_items:
             if self.player.use_item(ResourceType.TRAP):
                 # Place trap at player position
-                self.traps.append(Trap(self.player.rect.centerx, self.player.rect.centery))
+                self.traps.append(self.trap_pool.acquire(self.player.rect.centerx, self.player.rect.centery))
+        if prof:
+            prof.lap("input")
         
         # Move player
-        self.player.move(dx, dy, self.obstacles)
+        self.player.move(dx, dy, self.collision_world)
         
-        # Update noise level (decays over time)
-        if self.noise_level > 0:
-            self.noise_level -= 0.5
+        # The player's own noise goes in, then all noise spreads and fades by a tick
+        self.noise.emit(self.player.rect.center, self.player.last_noise_level)
+        self.noise.step()
+        if prof:
+            prof.lap("player move")
         
         # Check collisions with resources
         for resource in list(self.resources):
             if self.player.rect.colliderect(resource.rect):
                 self.player.add_to_inventory(resource.type)
                 self.resources.remove(resource)
-                pickup_sound.play()
+                self.resource_pool.release(resource)
+                self.play_sound("pickup")
                 
                 # Apply immediate effects
                 if resource.type == ResourceType.FOOD:
@@ -248,29 +546,69 @@ class Game:
                     self.player.restore_stamina(15)
                 elif resource.type == ResourceType.MEDKIT:
                     self.player.heal(30)
+        if prof:
+            prof.lap("resource pickup")
         
         # Check collisions with traps (for zombies)
         for trap in list(self.traps):
             if trap.activated:
                 if trap.update():  # Returns True if trap duration is over
                     self.traps.remove(trap)
+                    self.trap_pool.release(trap)
             else:
-                for zombie in self.zombies:
+                for index in self.broadphase.query_rect(trap.rect, TILE_SIZE // 2).tolist():
+                    zombie = self.zombies[index]
                     if zombie.rect.colliderect(trap.rect):
                         trap.activated = True
                         zombie.stun(300)  # 5 seconds at 60 FPS
-        
-        # Update zombies
+                        self.noise.emit(trap.rect.center, TRAP_NOISE)
+        if prof:
+            prof.lap("traps")
+        
+        # Large worlds load and park chunks as the player crosses chunk borders
+        if self.streaming:
+            self.stream_world()
+        
+        # Rebuild the flow field only when the player changed cell or the map changed
+        flow_field = None
+        if self.use_flow_field or self.streaming:
+            self.flow_field.update(self.player.get_grid_pos(), self.grid)
+            flow_field = self.flow_field
+        if prof:
+            prof.lap("pathfinding")
+        
+        # Stun countdown, detection and state changes for the whole swarm at once
+        active = self.swarm.update_states(self.player, self.noise)
+        # Zombies that just caught on growl, quieter the further away they are
+        if self.audio is not None:
+            for index in self.swarm.alerted:
+                self.play_sound("zombie_growl", self.zombies[index].rect.center)
+        
+        # Zombie decisions, near ones every tick and far ones staggered
+        self.ai_scheduler.run(self.swarm, self.player, active, self.collision_world, self.grid, flow_field)
+        if prof:
+            prof.lap("ai think")
+            # Zombies that thought this tick, and those the time budget pushed to the next
+            scheduler = self.ai_scheduler
+            prof.note("ai think", f"{scheduler.thinks} +{scheduler.deferred} late")
+        
+        # Update zombies (movement runs every tick)
         for zombie in self.zombies:
-            zombie.update(self.player, self.obstacles, self.grid, self.noise_level)
-            zombie.update_movement(self.player, self.obstacles, self.grid)
-            
-            # Check collision with player
-          # Check collision with player
+            zombie.update_movement(self.player, self.collision_world, self.grid, flow_field)
+        
+        # Keep the swarm's position arrays and the broadphase in step with the zombie rects
+        self.swarm.sync_positions()
+        self.update_broadphase()
+        
+        # Check collision with player
+        for index in self.broadphase.query_rect(self.player.rect, TILE_SIZE // 2).tolist():
+            zombie = self.zombies[index]
             if zombie.rect.colliderect(self.player.rect) and not zombie.is_stunned:
                 if self.player.take_damage(1):  # Returns True if player died
                     self.state = GameState.GAME_OVER
-                    zombie_growl.play()
+                    self.play_sound("zombie_growl", zombie.rect.center)
+        if prof:
+            prof.lap("zombie update")
         
         # Check if player reached safe zone
         if self.safe_zone.rect.colliderect(self.player.rect):
@@ -278,6 +616,10 @@ class Game:
         
         # Update weather
         self.update_weather()
+        if prof:
+            prof.lap("weather")
+        
+        return self.state
     
     def update_weather(self):
         self.weather_timer -= 1
@@ -286,355 +628,287 @@ class Game:
             # Change weather randomly
             weathers = ["clear", "fog", "rain", "storm"]
             weights = [0.4, 0.3, 0.2, 0.1]  # Probabilities for each weather
-            self.weather = random.choices(weathers, weights=weights, k=1)[0]
-            self.weather_timer = self.weather_duration + random.randint(-100, 100)
+            self.weather = self.rng.choices(weathers, weights=weights, k=1)[0]
+            self.full_redraw = True
+            self.weather_timer = self.weather_duration + self.rng.randint(-100, 100)
             
             # Set fog intensity if fog weather
             if self.weather == "fog":
-                self.fog_intensity = random.uniform(0.3, 0.7)
+                self.fog_intensity = self.rng.uniform(0.3, 0.7)
             else:
                 self.fog_intensity = 0
     
-    def draw_game(self):
-        # Clear screen
-        screen.fill(BLACK)
-        
-        # Draw obstacles
-        for obstacle in self.obstacles:
-            obstacle.draw(screen)
-        
-        # Draw safe zone
-        self.safe_zone.draw(screen)
+    def draw_game(self, alpha=1.0):
+        # alpha is how far the display is from the previous tick to the latest one
+        if self.headless:
+            return []
+        if assets.atlas is None:
+            self.prepare_sprites()
+        self.alpha = alpha
+        self.menu_shown = None
+        if self.streaming:
+            return self.draw_world_frame()
+        if self.background is None:
+            self.build_static_layer()
+        
+        prof = self.profiler if self.profiler.enabled else None
+        if prof:
+            prof.begin()
+        
+        # Weather overlays cover the whole map, so they need a full frame
+        if self.full_redraw or self.weather != "clear":
+            return self.draw_full_frame(prof)
+        
+        # Areas covered by moving things last frame and this frame
+        player_offset, zombie_offsets = self.lerp_offsets()
+        moving_rects = self.get_moving_rects(player_offset, zombie_offsets)
+        dirty_rects = self.prev_dirty_rects + moving_rects
+        
+        # Picked up resources leave a hole to restore
+        if len(self.drawn_resources) != len(self.resources):
+            dirty_rects.extend(resource.rect for resource in self.drawn_resources
+                               if resource not in self.resources)
+            self.drawn_resources = list(self.resources)
+        
+        # Resources are static, so restore them whole if anything touched them
+        touched_resources = [resource for resource in self.resources
+                             if resource.rect.collidelist(dirty_rects) != -1]
+        dirty_rects.extend(resource.rect for resource in touched_resources)
+        
+        # Restore the pre-rendered map under every dirty region
+        for rect in dirty_rects:
+            self.screen.blit(self.background, rect, rect)
+        if prof:
+            prof.lap("obstacles")
+        
+        for resource in touched_resources:
+            resource.draw(self.screen)
+        self.draw_entities(player_offset, zombie_offsets)
+        if prof:
+            prof.lap("entities")
+        
+        # Draw UI, only sending the panel to the display when it changed or was drawn over
+        ui_rect = self.get_ui_rect()
+        redraw_ui = prof is not None or ui_rect.collidelist(dirty_rects) != -1
+        if self.draw_ui(force=redraw_ui) or redraw_ui:
+            dirty_rects.append(ui_rect)
+        if prof:
+            prof.lap("draw_ui")
+            self.draw_profiler_overlay()
+        
+        self.prev_dirty_rects = moving_rects
+        return dirty_rects
+    
+    def draw_full_frame(self, prof=None):
+        # Pre-rendered obstacles and safe zone
+        self.screen.blit(self.background, (0, 0))
+        if prof:
+            prof.lap("obstacles")
         
         # Draw resources
         for resource in self.resources:
-            resource.draw(screen)
+            resource.draw(self.screen)
         
-        # Draw traps
-        for trap in self.traps:
-            trap.draw(screen)
+        player_offset, zombie_offsets = self.lerp_offsets()
+        self.draw_entities(player_offset, zombie_offsets)
+        if prof:
+            prof.lap("entities")
         
-        # Draw zombies
-        for zombie in self.zombies:
-            zombie.draw(screen)
+        # Draw UI
+        self.draw_ui()
+        if prof:
+            prof.lap("draw_ui")
         
-        # Draw player
-        self.player.draw(screen)
+        # Apply weather effects
+        self.apply_weather_effects()
+        if prof:
+            prof.lap("weather effects")
+            self.draw_profiler_overlay()
+        
+        self.full_redraw = False
+        self.prev_dirty_rects = self.get_moving_rects(player_offset, zombie_offsets)
+        self.drawn_resources = list(self.resources)
+        return [self.screen.get_rect()]
+    
+    def draw_world_frame(self):
+        # The camera scrolls every frame, so large worlds always redraw the view
+        prof = self.profiler if self.profiler.enabled else None
+        if prof:
+            prof.begin()
+        
+        player_offset, zombie_offsets = self.lerp_offsets()
+        self.camera.follow(self.player.rect.move(-player_offset[0], -player_offset[1]))
+        offset = self.camera.offset
+        view = self.camera.rect
+        
+        # Pre-rendered chunk surfaces under the view
+        self.screen.fill(BLACK)
+        span = self.world.chunk_size * TILE_SIZE
+        for key in self.world.visible_chunks(view):
+            self.screen.blit(self.world.chunk_surface(key),
+                             (key[0] * span - offset[0], key[1] * span - offset[1]))
+        if self.camera.is_visible(self.safe_zone.rect):
+            self.safe_zone.draw(self.screen, offset)
+        if prof:
+            prof.lap("obstacles")
+        
+        for resource in self.resources:
+            if view.colliderect(resource.rect):
+                resource.draw(self.screen, offset)
+        for trap in self.traps:
+            if view.colliderect(trap.rect):
+                trap.draw(self.screen, offset)
+        for zombie, (lag_x, lag_y) in zip(self.zombies, zombie_offsets):
+            if view.colliderect(zombie.rect):
+                zombie.draw(self.screen, (offset[0] + lag_x, offset[1] + lag_y))
+        self.player.draw(self.screen, (offset[0] + player_offset[0], offset[1] + player_offset[1]))
+        if prof:
+            prof.lap("entities")
         
         # Draw UI
         self.draw_ui()
+        if prof:
+            prof.lap("draw_ui")
         
         # Apply weather effects
         self.apply_weather_effects()
+        if prof:
+            prof.lap("weather effects")
+            self.draw_profiler_overlay()
+        
+        return [self.screen.get_rect()]
+    
+    def lerp_offsets(self):
+        # Moving entities are drawn (1 - alpha) of their last tick's movement behind
+        # their rects, so motion stays smooth whatever the frame rate. Returns the
+        # player's draw offset and one per zombie (from the swarm's velocities).
+        lag = 1.0 - self.alpha
+        if lag <= 0:
+            return (0, 0), [(0, 0)] * len(self.zombies)
+        prev_x, prev_y = self.player_prev_pos
+        player_offset = (round((self.player.rect.x - prev_x) * lag),
+                         round((self.player.rect.y - prev_y) * lag))
+        zombie_offsets = np.rint(self.swarm.velocities[:self.swarm.count] * lag).astype(int).tolist()
+        return player_offset, zombie_offsets
+    
+    def draw_entities(self, player_offset, zombie_offsets):
+        # Draw traps
+        for trap in self.traps:
+            trap.draw(self.screen)
+        
+        # Draw zombies
+        for zombie, offset in zip(self.zombies, zombie_offsets):
+            zombie.draw(self.screen, offset)
+        
+        # Draw player
+        self.player.draw(self.screen, player_offset)
+    
+    def get_moving_rects(self, player_offset, zombie_offsets):
+        # Where moving things are drawn this frame. Copies, since entity rects
+        # are moved in place next tick.
+        rects = [trap.rect.copy() for trap in self.traps]
+        rects.extend(zombie.rect.move(-offset[0], -offset[1])
+                     for zombie, offset in zip(self.zombies, zombie_offsets))
+        rects.append(self.player.get_draw_rect().move(-player_offset[0], -player_offset[1]))
+        return rects
+    
+    def get_ui_rect(self):
+        return pygame.Rect(SCREEN_WIDTH - 220, 0, 220, SCREEN_HEIGHT)
+    
+    def draw_profiler_overlay(self):
+        # Fills the free space in the UI panel between the inventory and the weather
+        ui_x = SCREEN_WIDTH - 220
+        pygame.draw.rect(self.screen, (30, 30, 30), (ui_x, 362, 220, 150))
+        self.profiler.draw(self.screen, ui_x + 10, 365, 200)
     
     def apply_weather_effects(self):
-        if self.weather == "fog":
-            # Create fog effect by drawing semi-transparent overlay
-            fog_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            fog_surface.fill((200, 200, 200, int(self.fog_intensity * 150)))
-            screen.blit(fog_surface, (0, 0))
-        
-        elif self.weather == "rain":
-            # Create rain effect by drawing lines
-            for _ in range(100):
-                x = random.randint(0, SCREEN_WIDTH)
-                y = random.randint(0, SCREEN_HEIGHT)
-                length = random.randint(5, 15)
-                pygame.draw.line(screen, (200, 200, 255), (x, y), (x - 2, y + length), 1)
-        
-        elif self.weather == "storm":
-            # Create storm effect with occasional lightning
-            for _ in range(150):
-                x = random.randint(0, SCREEN_WIDTH)
-                y = random.randint(0, SCREEN_HEIGHT)
-                length = random.randint(5, 20)
-                pygame.draw.line(screen, (200, 200, 255), (x, y), (x - 3, y + length), 1)
-            
-            # Occasional lightning flash
-            if random.random() < 0.02:
-                flash_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-                flash_surface.fill((255, 255, 255, 50))
-                screen.blit(flash_surface, (0, 0))
-    
-    def draw_ui(self):
-        ui_x = SCREEN_WIDTH - 220  # UI panel starts at the right edge
-
-        # Draw UI background panel
-        pygame.draw.rect(screen, (50, 50, 50), (ui_x, 0, 220, SCREEN_HEIGHT))  # Dark UI background
-
-        # Load images (ensure these images exist in your assets folder)
-        health_icon = pygame.image.load("assets/medkit.png")
-        stamina_icon = pygame.image.load("assets/medkit.png")
-        inventory_icon = pygame.image.load("assets/food.png")
-        weather_icon = pygame.image.load("assets/food.png")
-        danger_icon = pygame.image.load("assets/zombie.png")
-
-        health_icon = pygame.transform.scale(health_icon, (25, 25))
-        stamina_icon = pygame.transform.scale(stamina_icon, (25, 25))
-        inventory_icon = pygame.transform.scale(inventory_icon, (25, 25))
-        weather_icon = pygame.transform.scale(weather_icon, (25, 25))
-        danger_icon = pygame.transform.scale(danger_icon, (40, 40))
-
-        # Draw health and stamina bars with icons
-        health_width = int(160 * (self.player.health / self.player.max_health))
-        stamina_width = int(160 * (self.player.stamina / self.player.max_stamina))
-
-        screen.blit(health_icon, (ui_x + 10, 10))
-        pygame.draw.rect(screen, RED, (ui_x + 40, 15, 160, 20))  # Background bar
-        pygame.draw.rect(screen, GREEN, (ui_x + 40, 15, health_width, 20))  # Filled bar
-
-        screen.blit(stamina_icon, (ui_x + 10, 45))
-        pygame.draw.rect(screen, GRAY, (ui_x + 40, 50, 160, 15))  # Background bar
-        pygame.draw.rect(screen, YELLOW, (ui_x + 40, 50, stamina_width, 15))  # Filled bar
-
-        # Draw inventory section with icons
-        screen.blit(inventory_icon, (ui_x + 10, 85))
-        inventory_text = font.render("Inventory:", True, WHITE)
-        screen.blit(inventory_text, (ui_x + 40, 85))
-
-        y_offset = 120
-        for res_type in ResourceType:
-            count = self.player.inventory[res_type]
-            item_image = pygame.image.load(f"assets/{res_type.name.lower()}.png")  
-            item_image = pygame.transform.scale(item_image, (30, 30))  
-            screen.blit(item_image, (ui_x + 10, y_offset))
-            count_text = small_font.render(f"x{count}", True, WHITE)
-            screen.blit(count_text, (ui_x + 50, y_offset + 5))
-            y_offset += 40  
-
-        # Draw weather indicator with an image
-        screen.blit(weather_icon, (ui_x + 10, SCREEN_HEIGHT - 80))
-        weather_text = small_font.render(self.weather.capitalize(), True, WHITE)
-        screen.blit(weather_text, (ui_x + 50, SCREEN_HEIGHT - 75))
-
-        # Draw zombie proximity indicator
-        closest_zombie_dist = float('inf')
-        for zombie in self.zombies:
-            dist = math.sqrt((zombie.rect.centerx - self.player.rect.centerx)**2 + 
-                            (zombie.rect.centery - self.player.rect.centery)**2)
-            closest_zombie_dist = min(closest_zombie_dist, dist)
-
-        if closest_zombie_dist < 150:
-            screen.blit(danger_icon, (ui_x + 10, SCREEN_HEIGHT - 40))  # Show danger icon
+        self.weather_effects.draw(self.screen, self.weather, self.fog_intensity)
     
+    def draw_ui(self, force=True):
+        # The side panel is cached and only rebuilt when something on it changed.
+        # force blits it even when unchanged, e.g. after the map was drawn over it.
+        # Returns True if it changed.
+        _, closest_zombie_dist = self.broadphase.nearest(self.player.rect.center, 150)
+        return self.hud.draw(self.screen, self.player, self.weather, closest_zombie_dist < 150, force)
     
+    def menu(self, state):
+        # The menu screen of a state (None while playing), laid out and rendered
+        # the first time it is needed
+        menu = self.menus.get(state)
+        if menu is None and state in MENU_SCREENS:
+            background, title, title_color, title_y, buttons, buttons_y = MENU_SCREENS[state]
+            menu = self.menus[state] = Menu(background, title, title_color, title_y, buttons,
+                                            buttons_y, self.title_font, self.font)
+        return menu
     
+    def draw_menu(self, selected=None):
+        # Blits the current menu screen when it differs from what is on screen.
+        # Returns the dirty rects, empty when nothing changed.
+        shown = (self.state, selected)
+        if shown == self.menu_shown:
+            return []
+        self.screen.blit(self.menu(self.state).layer(selected), (0, 0))
+        self.menu_shown = shown
+        self.menu_zombie_rects = []
+        return [self.screen.get_rect()]
     
     def draw_main_menu(self):
-        # Draw dark background with fog effect
-        screen.fill((20, 20, 30))
+        self.prepare_sprites(wait=False)
+        dirty_rects = self.draw_menu()
+        menu = self.menu(GameState.MAIN_MENU)
         
-        # Add wandering zombies in background
+        # Wandering zombies in the background, the only thing that moves
+        zombie_rects = []
         for i in range(10):
-            x = int(SCREEN_WIDTH / 2 + 100 * math.sin(self.time_elapsed / 100 + i))
-            y = int(SCREEN_HEIGHT / 2 + 80 * math.cos(self.time_elapsed / 120 + i))
-            pygame.draw.rect(screen, (150, 0, 0), (x, y, 20, 20))
-        
-        # Draw title
-        title_text = pygame.font.SysFont(None, 72).render("ZOMBIE ESCAPE", True, RED)
-        screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 100))
-        
-        # Draw buttons
-        button_width, button_height = 200, 50
-        button_x = SCREEN_WIDTH // 2 - button_width // 2
-        
-        # Play button
-        play_button = pygame.Rect(button_x, 250, button_width, button_height)
-        pygame.draw.rect(screen, GRAY, play_button)
-        play_text = font.render("PLAY", True, WHITE)
-        screen.blit(play_text, (play_button.centerx - play_text.get_width() // 2, 
-                              play_button.centery - play_text.get_height() // 2))
-        
-        # Settings button
-        settings_button = pygame.Rect(button_x, 320, button_width, button_height)
-        pygame.draw.rect(screen, GRAY, settings_button)
-        settings_text = font.render("SETTINGS", True, WHITE)
-        screen.blit(settings_text, (settings_button.centerx - settings_text.get_width() // 2, 
-                                  settings_button.centery - settings_text.get_height() // 2))
-        
-        # Quit button
-        quit_button = pygame.Rect(button_x, 390, button_width, button_height)
-        pygame.draw.rect(screen, GRAY, quit_button)
-        quit_text = font.render("QUIT", True, WHITE)
-        screen.blit(quit_text, (quit_button.centerx - quit_text.get_width() // 2, 
-                              quit_button.centery - quit_text.get_height() // 2))
+            x = int(SCREEN_WIDTH / 2 + 100 * math.sin(self.frame_count / 100 + i))
+            y = int(SCREEN_HEIGHT / 2 + 80 * math.cos(self.frame_count / 120 + i))
+            zombie_rects.append(pygame.Rect(x, y, 20, 20))
+        
+        # Clear where they were, draw them where they are, and put the
+        # title and buttons back on top
+        moved = self.menu_zombie_rects + zombie_rects
+        for rect in moved:
+            self.screen.fill(menu.background, rect)
+        for rect in zombie_rects:
+            pygame.draw.rect(self.screen, (150, 0, 0), rect)
+        for rect in moved:
+            menu.draw_over(self.screen, rect)
+        self.menu_zombie_rects = zombie_rects
+        dirty_rects.extend(moved)
         
         # Heartbeat effect
-        if self.time_elapsed % 60 == 0:
-            heartbeat_sound.play()
+        if self.frame_count % 60 == 0:
+            self.play_sound("heartbeat")
         
-        return play_button, settings_button, quit_button
+        return dirty_rects
     
     def draw_settings_menu(self):
-        # Draw background
-        screen.fill((20, 20, 30))
-        
-        # Draw title
-        title_text = pygame.font.SysFont(None, 72).render("SETTINGS", True, WHITE)
-        screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 100))
-        
-        # Draw difficulty options
-        button_width, button_height = 200, 50
-        button_x = SCREEN_WIDTH // 2 - button_width // 2
-        
-        # Easy button
-        easy_button = pygame.Rect(button_x, 250, button_width, button_height)
-        if self.difficulty == "easy":
-            pygame.draw.rect(screen, GREEN, easy_button)
-        else:
-            pygame.draw.rect(screen, GRAY, easy_button)
-        easy_text = font.render("EASY", True, WHITE)
-        screen.blit(easy_text, (easy_button.centerx - easy_text.get_width() // 2, 
-                              easy_button.centery - easy_text.get_height() // 2))
-        
-        # Normal button
-        normal_button = pygame.Rect(button_x, 320, button_width, button_height)
-        if self.difficulty == "normal":
-            pygame.draw.rect(screen, GREEN, normal_button)
-        else:
-            pygame.draw.rect(screen, GRAY, normal_button)
-        normal_text = font.render("NORMAL", True, WHITE)
-        screen.blit(normal_text, (normal_button.centerx - normal_text.get_width() // 2, 
-                                normal_button.centery - normal_text.get_height() // 2))
-        
-        # Hard button
-        hard_button = pygame.Rect(button_x, 390, button_width, button_height)
-        if self.difficulty == "hard":
-            pygame.draw.rect(screen, GREEN, hard_button)
-        else:
-            pygame.draw.rect(screen, GRAY, hard_button)
-        hard_text = font.render("HARD", True, WHITE)
-        screen.blit(hard_text, (hard_button.centerx - hard_text.get_width() // 2, 
-                              hard_button.centery - hard_text.get_height() // 2))
-        
-        # Back button
-        back_button = pygame.Rect(button_x, 460, button_width, button_height)
-        pygame.draw.rect(screen, GRAY, back_button)
-        back_text = font.render("BACK", True, WHITE)
-        screen.blit(back_text, (back_button.centerx - back_text.get_width() // 2, 
-                              back_button.centery - back_text.get_height() // 2))
-        
-        return easy_button, normal_button, hard_button, back_button
+        # The chosen difficulty is highlighted
+        return self.draw_menu(self.difficulty)
     
     def draw_game_over(self):
-        # Draw dark red background
-        screen.fill((50, 0, 0))
-        
-        # Draw game over text
-        gameover_text = pygame.font.SysFont(None, 72).render("GAME OVER", True, WHITE)
-        screen.blit(gameover_text, (SCREEN_WIDTH // 2 - gameover_text.get_width() // 2, 200))
-        
-        # Draw buttons
-        button_width, button_height = 200, 50
-        button_x = SCREEN_WIDTH // 2 - button_width // 2
-        
-        # Restart button
-        restart_button = pygame.Rect(button_x, 300, button_width, button_height)
-        pygame.draw.rect(screen, GRAY, restart_button)
-        restart_text = font.render("RESTART", True, WHITE)
-        screen.blit(restart_text, (restart_button.centerx - restart_text.get_width() // 2, 
-                                 restart_button.centery - restart_text.get_height() // 2))
-        
-        # Main menu button
-        menu_button = pygame.Rect(button_x, 370, button_width, button_height)
-        pygame.draw.rect(screen, GRAY, menu_button)
-        menu_text = font.render("MAIN MENU", True, WHITE)
-        screen.blit(menu_text, (menu_button.centerx - menu_text.get_width() // 2, 
-                              menu_button.centery - menu_text.get_height() // 2))
-        
-        # Quit button
-        quit_button = pygame.Rect(button_x, 440, button_width, button_height)
-        pygame.draw.rect(screen, GRAY, quit_button)
-        quit_text = font.render("QUIT", True, WHITE)
-        screen.blit(quit_text, (quit_button.centerx - quit_text.get_width() // 2, 
-                              quit_button.centery - quit_text.get_height() // 2))
-        
-        return restart_button, menu_button, quit_button
+        return self.draw_menu()
     
     def draw_win_screen(self):
-        # Draw dark green background
-        screen.fill((0, 50, 0))
-        
-        # Draw win text
-        win_text = pygame.font.SysFont(None, 72).render("YOU SURVIVED!", True, WHITE)
-        screen.blit(win_text, (SCREEN_WIDTH // 2 - win_text.get_width() // 2, 200))
-        
-        # Draw buttons
-        button_width, button_height = 200, 50
-        button_x = SCREEN_WIDTH // 2 - button_width // 2
-        
-        # Play again button
-        play_again_button = pygame.Rect(button_x, 300, button_width, button_height)
-        pygame.draw.rect(screen, GRAY, play_again_button)
-        play_again_text = font.render("PLAY AGAIN", True, WHITE)
-        screen.blit(play_again_text, (play_again_button.centerx - play_again_text.get_width() // 2, 
-                                    play_again_button.centery - play_again_text.get_height() // 2))
-        
-        # Main menu button
-        menu_button = pygame.Rect(button_x, 370, button_width, button_height)
-        pygame.draw.rect(screen, GRAY, menu_button)
-        menu_text = font.render("MAIN MENU", True, WHITE)
-        screen.blit(menu_text, (menu_button.centerx - menu_text.get_width() // 2, 
-                              menu_button.centery - menu_text.get_height() // 2))
-        
-        # Quit button
-        quit_button = pygame.Rect(button_x, 440, button_width, button_height)
-        pygame.draw.rect(screen, GRAY, quit_button)
-        quit_text = font.render("QUIT", True, WHITE)
-        screen.blit(quit_text, (quit_button.centerx - quit_text.get_width() // 2, 
-                              quit_button.centery - quit_text.get_height() // 2))
-        
-        return play_again_button, menu_button, quit_button
+        return self.draw_menu()
     
     def handle_menu_event(self, event):
-        if self.state == GameState.MAIN_MENU:
-            play_button, settings_button, quit_button = self.draw_main_menu()
-            
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                if play_button.collidepoint(event.pos):
-                    self.state = GameState.PLAYING
-                    self.init_game()
-                elif settings_button.collidepoint(event.pos):
-                    self.state = GameState.SETTINGS
-                elif quit_button.collidepoint(event.pos):
-                    pygame.quit()
-                    sys.exit()
-        
-        elif self.state == GameState.SETTINGS:
-            easy_button, normal_button, hard_button, back_button = self.draw_settings_menu()
-            
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                if easy_button.collidepoint(event.pos):
-                    self.difficulty = "easy"
-                elif normal_button.collidepoint(event.pos):
-                    self.difficulty = "normal"
-                elif hard_button.collidepoint(event.pos):
-                    self.difficulty = "hard"
-                elif back_button.collidepoint(event.pos):
-                    self.state = GameState.MAIN_MENU
-        
-        elif self.state == GameState.GAME_OVER:
-            restart_button, menu_button, quit_button = self.draw_game_over()
-            
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                if restart_button.collidepoint(event.pos):
-                    self.state = GameState.PLAYING
-                    self.init_game()
-                elif menu_button.collidepoint(event.pos):
-                    self.state = GameState.MAIN_MENU
-                elif quit_button.collidepoint(event.pos):
-                    pygame.quit()
-                    sys.exit()
-        
-        elif self.state == GameState.WIN:
-            play_again_button, menu_button, quit_button = self.draw_win_screen()
-            
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                if play_again_button.collidepoint(event.pos):
-                    self.state = GameState.PLAYING
-                    self.init_game()
-                elif menu_button.collidepoint(event.pos):
-                    self.state = GameState.MAIN_MENU
-                elif quit_button.collidepoint(event.pos):
-                    pygame.quit()
-                    sys.exit()
+        if event.type != pygame.MOUSEBUTTONDOWN or event.button != 1:
+            return
+        menu = self.menu(self.state)
+        if menu is None:
+            return
+        
+        action = menu.hit(event.pos)
+        if action == "play":
+            self.state = GameState.PLAYING
+            self.init_game()
+        elif action == "settings":
+            self.state = GameState.SETTINGS
+        elif action in ("easy", "normal", "hard"):
+            self.difficulty = action
+        elif action == "back" or action == "menu":
+            self.state = GameState.MAIN_MENU
+        elif action == "quit":
+            # Leave through main's loop, same as closing the window
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
@@ -0,0 +1,81 @@
+import time
+import numpy as np
+from game_states import ZombieState
+
+
+class AIScheduler:
+    # Decides which zombies think (Zombie.act) each tick. Movement still runs for
+    # every zombie every tick; only the decisions are spread out:
+    #   - zombies near the player think every tick, nearest first
+    #   - zombies further away think every far_interval ticks, staggered by slot
+    #   - without a flow field, chasing zombies replan their BFS path when they
+    #     run out of path or on a replan_interval stagger
+    # Thinking stops for the tick once budget_ms is used up; whoever missed out
+    # is first in line next tick. A budget of None (recording / replay) keeps
+    # runs deterministic by never cutting a tick short.
+    def __init__(self, budget_ms=2.0, near_radius=300, far_interval=4, replan_interval=15):
+        self.budget_ms = budget_ms
+        self.near_radius = near_radius
+        self.far_interval = far_interval
+        self.replan_interval = replan_interval
+        self.tick = 0
+        self.carry_over = []  # Zombies that ran out of budget last tick
+        # Stats for the last tick
+        self.thinks = 0
+        self.deferred = 0
+
+    def reset(self):
+        self.tick = 0
+        self.carry_over = []
+
+    def select(self, swarm, player, active, flow_field=None):
+        # Slot indices that should think this tick, most urgent first
+        n = swarm.count
+        slots = np.arange(n)
+        offsets = swarm.positions[:n] - player.rect.center
+        dist_sq = np.einsum("ij,ij->i", offsets, offsets)
+        near = dist_sq < self.near_radius * self.near_radius
+        due = (slots + self.tick) % self.far_interval == 0
+
+        chasing = swarm.states[:n] == ZombieState.CHASE.value
+        if flow_field is not None:
+            # Chasing zombies read the shared flow field while moving
+            wants = ~chasing & (near | due)
+        else:
+            replan = (slots + self.tick) % self.replan_interval == 0
+            no_path = np.array([not zombie.path for zombie in swarm.zombies], dtype=bool)
+            wants = np.where(chasing, replan | no_path, near | due)
+
+        wants &= np.asarray(active, dtype=bool)
+        selected = np.flatnonzero(wants)
+        return selected[np.argsort(dist_sq[selected], kind="stable")].tolist()
+
+    def run(self, swarm, player, active, world, grid, flow_field=None):
+        # Lets the selected zombies act within the time budget
+        self.tick += 1
+        zombies = swarm.zombies
+        order = self.select(swarm, player, active, flow_field)
+
+        # Zombies cut off last tick go first (if they still exist and can act)
+        if self.carry_over:
+            carried = [zombie.index for zombie in self.carry_over
+                       if zombie.index < swarm.count and zombies[zombie.index] is zombie
+                       and active[zombie.index]]
+            seen = set(carried)
+            order = carried + [index for index in order if index not in seen]
+
+        deadline = None
+        if self.budget_ms is not None:
+            deadline = time.perf_counter() + self.budget_ms / 1000
+
+        thinks = 0
+        for index in order:
+            zombies[index].act(player, world, grid, flow_field)
+            thinks += 1
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+        self.carry_over = [zombies[index] for index in order[thinks:]]
+        self.thinks = thinks
+        self.deferred = len(self.carry_over)
+        return thinks
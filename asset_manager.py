@@ -0,0 +1,125 @@
+import threading
+import time
+import pygame
+from settings import TILE_SIZE
+
+
+ENTITY_SIZE = (TILE_SIZE - 10, TILE_SIZE - 10)
+TILE = (TILE_SIZE, TILE_SIZE)
+ITEM_SIZE = (TILE_SIZE // 2, TILE_SIZE // 2)
+
+# Every sprite the game draws, at the sizes it draws them
+GAME_SPRITES = [
+    ("assets/player_idle.png", ENTITY_SIZE),
+    ("assets/player_moving.png", ENTITY_SIZE),
+    ("assets/zombie.png", ENTITY_SIZE),
+    ("assets/people.png", ENTITY_SIZE),
+    ("assets/markov.png", ENTITY_SIZE),
+    ("assets/wall.png", TILE),
+    ("assets/tree.png", TILE),
+    ("assets/fence.png", TILE),
+    ("assets/helicopter.png", (TILE_SIZE * 2, TILE_SIZE * 2)),
+    ("assets/food.png", ITEM_SIZE),
+    ("assets/water.png", ITEM_SIZE),
+    ("assets/medkit.png", ITEM_SIZE),
+    ("assets/weapon.png", ITEM_SIZE),
+    ("assets/flashbang.png", ITEM_SIZE),
+    ("assets/trap.png", ITEM_SIZE),
+    # UI panel icons
+    ("assets/medkit.png", (25, 25)),
+    ("assets/food.png", (25, 25)),
+    ("assets/zombie.png", (40, 40)),
+    ("assets/food.png", (30, 30)),
+    ("assets/water.png", (30, 30)),
+    ("assets/medkit.png", (30, 30)),
+    ("assets/weapon.png", (30, 30)),
+    ("assets/flashbang.png", (30, 30)),
+    ("assets/trap.png", (30, 30)),
+]
+
+
+class AssetManager:
+    def __init__(self):
+        # Decoded images keyed by path, scaled variants keyed by (path, size)
+        self.images = {}
+        self.scaled = {}
+        self.atlas = None
+        # Files decoded ahead of time on a background thread, not yet converted
+        # to the display format (that needs the main thread and a window)
+        self.decoded = {}
+        self.decoder = None
+        self.decode_seconds = None
+
+    def decode_async(self, sprites):
+        # Starts reading and decoding the sprites' files in the background.
+        # pygame lets other threads run while it decodes an image, so this
+        # overlaps with whatever the main thread is doing (the main menu).
+        paths = list(dict.fromkeys(path for path, _ in sprites))
+        self.decoder = threading.Thread(target=self.decode, args=(paths,), name="sprite-decoder", daemon=True)
+        self.decoder.start()
+
+    def decode(self, paths):
+        start = time.perf_counter()
+        for path in paths:
+            if path not in self.images:
+                self.decoded[path] = pygame.image.load(path)
+        self.decode_seconds = time.perf_counter() - start
+
+    def decoding(self):
+        return self.decoder is not None and self.decoder.is_alive()
+
+    def load(self, path):
+        image = self.images.get(path)
+        if image is None:
+            if self.decoding():
+                # Most likely decoding this very file; no point doing it twice
+                self.decoder.join()
+            surface = self.decoded.pop(path, None)
+            if surface is None:
+                surface = pygame.image.load(path)
+            image = surface.convert_alpha()
+            self.images[path] = image
+        return image
+
+    def get(self, path, size=None):
+        if size is None:
+            return self.load(path)
+
+        key = (path, tuple(size))
+        image = self.scaled.get(key)
+        if image is None:
+            image = pygame.transform.scale(self.load(path), key[1])
+            self.scaled[key] = image
+        return image
+
+    def build_atlas(self, sprites, width=512, padding=1):
+        # Shelf-pack the scaled sprites, tallest first, into one surface
+        entries = sorted(set((path, tuple(size)) for path, size in sprites),
+                         key=lambda entry: entry[1][1], reverse=True)
+        placements = []
+        x = y = shelf_height = 0
+        for path, size in entries:
+            w, h = size
+            if x + w > width:
+                x = 0
+                y += shelf_height + padding
+                shelf_height = 0
+            placements.append((path, size, x, y))
+            x += w + padding
+            shelf_height = max(shelf_height, h)
+
+        atlas = pygame.Surface((width, y + shelf_height), pygame.SRCALPHA).convert_alpha()
+        atlas.fill((0, 0, 0, 0))
+        for path, size, x, y in placements:
+            # Straight copy of the pixels, alpha included
+            atlas.blit(self.get(path, size), (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+
+        # Serve the cached variants as views into the atlas from now on
+        for path, size, x, y in placements:
+            self.scaled[(path, size)] = atlas.subsurface((x, y, size[0], size[1]))
+
+        self.atlas = atlas
+        return atlas
+
+
+assets = AssetManager()
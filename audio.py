@@ -0,0 +1,124 @@
+import hashlib
+import os
+import threading
+import time
+import pygame
+
+
+# Every sound the game plays: (name, file, shortest gap in seconds between two plays)
+SOUNDS = [
+    ("heartbeat", "assets/heartbeat.wav", 0.5),
+    ("zombie_growl", "assets/zombie_growl.mp3", 0.25),
+    ("pickup", "assets/pickup.mp3", 0.05),
+]
+
+# Decoded samples are kept here between launches, one file per sound and mixer format
+CACHE_DIR = ".audio_cache"
+CHANNELS = 8
+HEARING_RANGE = 400  # Pixels; sounds further away than this are silent
+
+
+def distance_volume(source, listener, reach=HEARING_RANGE):
+    # Linear fall-off from full volume at the listener to silence at reach
+    distance = ((source[0] - listener[0]) ** 2 + (source[1] - listener[1]) ** 2) ** 0.5
+    return max(0.0, 1.0 - distance / reach)
+
+
+class AudioManager:
+    # Owns the mixer and every sound. Files are decoded once into raw samples
+    # in the mixer's format and cached on disk, so later launches only read
+    # them back. Loading runs on a background thread and sounds that aren't
+    # loaded yet are skipped. play() only notes the request: update(), once
+    # per frame, plays each requested sound at most once (at the loudest
+    # volume asked for), no more often than its minimum gap, on a channel
+    # from a fixed pool.
+    def __init__(self, sounds=SOUNDS, cache_dir=CACHE_DIR, channels=CHANNELS):
+        self.files = [(name, path) for name, path, _ in sounds]
+        self.min_interval = {name: gap for name, _, gap in sounds}
+        self.cache_dir = cache_dir
+        self.num_channels = channels
+        self.sounds = {}  # Name -> pygame Sound, filled in by the loader thread
+        self.channels = []
+        self.channel_started = []  # When each channel's current sound started
+        self.pending = {}  # Name -> loudest volume requested this frame
+        self.last_played = {}  # Name -> time it last started
+        self.ready = False
+
+    def start(self, startup=None):
+        threading.Thread(target=self.load, args=(startup,), name="audio-loader", daemon=True).start()
+
+    def load(self, startup=None):
+        start = time.perf_counter()
+        try:
+            pygame.mixer.init()
+        except pygame.error:
+            return  # No audio device: the game stays silent
+        pygame.mixer.set_num_channels(self.num_channels)
+        self.channels = [pygame.mixer.Channel(i) for i in range(self.num_channels)]
+        self.channel_started = [0.0] * self.num_channels
+        self.ready = True
+
+        mixer_format = pygame.mixer.get_init()
+        for name, path in self.files:
+            # A missing or unreadable file only silences that sound
+            try:
+                self.sounds[name] = self.load_sound(path, mixer_format)
+            except (pygame.error, OSError):
+                pass
+        if startup is not None:
+            startup.record("audio", time.perf_counter() - start)
+
+    def cache_path(self, path, mixer_format):
+        # Changes whenever the file or the mixer's sample format does
+        info = os.stat(path)
+        key = f"{path}:{info.st_size}:{info.st_mtime_ns}:{mixer_format}"
+        digest = hashlib.md5(key.encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{os.path.basename(path)}.{digest}.pcm")
+
+    def load_sound(self, path, mixer_format):
+        cached = self.cache_path(path, mixer_format)
+        try:
+            with open(cached, "rb") as f:
+                return pygame.mixer.Sound(buffer=f.read())
+        except OSError:
+            pass
+
+        sound = pygame.mixer.Sound(path)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Written under a temporary name first so a half-written file is never read
+            with open(cached + ".tmp", "wb") as f:
+                f.write(sound.get_raw())
+            os.replace(cached + ".tmp", cached)
+        except OSError:
+            pass  # Read-only install: decode again next time
+        return sound
+
+    def play(self, name, volume=1.0):
+        if volume > self.pending.get(name, 0.0):
+            self.pending[name] = volume
+
+    def update(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        if not self.ready:
+            return
+        now = time.perf_counter()
+        for name, volume in pending.items():
+            sound = self.sounds.get(name)
+            if sound is None or now - self.last_played.get(name, -1e9) < self.min_interval[name]:
+                continue
+            self.last_played[name] = now
+            index = self.free_channel()
+            self.channel_started[index] = now
+            channel = self.channels[index]
+            channel.play(sound)
+            channel.set_volume(volume)
+
+    def free_channel(self):
+        # An idle channel, or else the one whose sound has played the longest
+        for index, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return index
+        return min(range(len(self.channels)), key=self.channel_started.__getitem__)
@@ -0,0 +1,214 @@
+# Plays many headless games in parallel with a scripted player, for balancing
+# the difficulty settings.
+#
+#   python batch.py --games 500                       # every difficulty, all cores
+#   python batch.py --difficulties hard --zombies 12  # try a different zombie count
+#   python batch.py --output games.jsonl              # also keep one JSON line per game
+#
+# Each game is one task for the process pool, identified by its seed, so the same
+# seeds give the same results however many workers run them.
+import os
+
+# Workers never open a window or an audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+from Game import Game
+from flow_field import FlowField
+from game_states import GameState, ResourceType
+from inputs import InputState
+from settings import TILE_SIZE, DIFFICULTY_SETTINGS
+
+
+class ScriptedPlayer:
+    # Walks the shortest path to the safe zone, sprints and uses items when
+    # zombies get close, and now and then wanders off for a while so that
+    # games differ in more than the map
+    def __init__(self, game, rng, wander=0.1):
+        self.game = game
+        self.rng = rng
+        self.wander = wander
+        self.detour = None
+        self.detour_ticks = 0
+        self.last_pos = None
+        self.field = FlowField()
+        safe = game.safe_zone.rect
+        self.field.compute((safe.x // TILE_SIZE, safe.y // TILE_SIZE), game.grid)
+
+    def inputs(self):
+        game, player, rng = self.game, self.game.player, self.rng
+        _, threat = game.broadphase.nearest(player.rect.center, 200)
+        inventory = player.inventory
+
+        items = []
+        if player.health < 50 and inventory[ResourceType.MEDKIT]:
+            items.append(ResourceType.MEDKIT)
+        if player.stamina < 30:
+            items.append(ResourceType.FOOD if inventory[ResourceType.FOOD] else ResourceType.WATER)
+        if threat < 80:
+            items.append(ResourceType.FLASHBANG)
+        elif threat < 150:
+            items.append(ResourceType.TRAP)
+
+        # Being stuck on a corner also starts a detour
+        stuck = player.rect.topleft == self.last_pos
+        self.last_pos = player.rect.topleft
+        if not self.detour_ticks and (stuck or rng.random() < self.wander / 30):
+            self.detour = (rng.choice([-1, 0, 1]), rng.choice([-1, 0, 1]))
+            self.detour_ticks = rng.randint(10, 40)
+
+        if self.detour_ticks:
+            self.detour_ticks -= 1
+            dx, dy = self.detour
+        else:
+            dx, dy = self.direction()
+        return InputState(dx, dy, threat < 150, items)
+
+    def direction(self):
+        # Towards the middle of the next cell on the path, or the safe zone itself
+        rect = self.game.player.rect
+        cell = self.field.next_cell(self.game.player.get_grid_pos())
+        if cell is None:
+            target = self.game.safe_zone.rect.center
+        else:
+            target = (cell[0] * TILE_SIZE + TILE_SIZE // 2, cell[1] * TILE_SIZE + TILE_SIZE // 2)
+        step = self.game.player.speed // 2
+        dx = target[0] - rect.centerx
+        dy = target[1] - rect.centery
+        return ((dx > step) - (dx < -step), (dy > step) - (dy < -step))
+
+
+# One Game per difficulty and worker process, reused for every task it gets
+games = {}
+
+
+def play(task):
+    # Runs one game to the end (or max_ticks) and returns its result
+    difficulty, seed, max_ticks, wander, zombies, resources = task
+    game = games.get(difficulty)
+    if game is None:
+        game = games[difficulty] = Game(difficulty, headless=True, audio=False)
+        # The AI time budget would make results depend on how busy the machine is
+        game.ai_budget_ms = None
+    game.zombie_count = zombies
+    game.resource_count = resources
+    game.state = GameState.PLAYING
+    game.init_game(seed)
+
+    policy = ScriptedPlayer(game, random.Random(seed), wander)
+    step = game.step
+    ticks = 0
+    worst = 0.0
+    start = time.perf_counter()
+    while ticks < max_ticks and game.state == GameState.PLAYING:
+        tick_start = time.perf_counter()
+        step(policy.inputs())
+        worst = max(worst, time.perf_counter() - tick_start)
+        ticks += 1
+    seconds = time.perf_counter() - start
+
+    if game.state == GameState.WIN:
+        outcome = "win"
+    elif game.state == GameState.GAME_OVER:
+        outcome = "death"
+    else:
+        outcome = "timeout"
+    return {
+        "difficulty": difficulty,
+        "seed": seed,
+        "outcome": outcome,
+        "ticks": ticks,
+        "damage_taken": game.player.damage_taken,
+        "items_used": game.player.items_used,
+        "zombies": len(game.zombies),
+        "seconds": seconds,
+        "worst_tick_ms": worst * 1000,
+    }
+
+
+def run_batch(tasks, workers):
+    # Yields results as games finish, in whatever order that happens
+    if workers == 1:
+        for task in tasks:
+            yield play(task)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(play, tasks)
+
+
+def summarise(results):
+    # Per-difficulty statistics, keyed by difficulty
+    summary = {}
+    for difficulty in sorted({result["difficulty"] for result in results}):
+        games = [result for result in results if result["difficulty"] == difficulty]
+        count = len(games)
+        ticks = sum(game["ticks"] for game in games)
+        seconds = sum(game["seconds"] for game in games)
+        summary[difficulty] = {
+            "games": count,
+            "win_rate": sum(game["outcome"] == "win" for game in games) / count,
+            "death_rate": sum(game["outcome"] == "death" for game in games) / count,
+            "mean_ticks": ticks / count,
+            "mean_damage": sum(game["damage_taken"] for game in games) / count,
+            "mean_items": sum(game["items_used"] for game in games) / count,
+            "mean_tick_ms": seconds / max(ticks, 1) * 1000,
+            "worst_tick_ms": max(game["worst_tick_ms"] for game in games),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless Zombie Escape games in parallel")
+    parser.add_argument("--games", type=int, default=100, help="games per difficulty")
+    parser.add_argument("--difficulties", nargs="*", default=list(DIFFICULTY_SETTINGS),
+                        choices=list(DIFFICULTY_SETTINGS))
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-ticks", type=int, default=60 * 120, help="give up on a game after this many ticks")
+    parser.add_argument("--wander", type=float, default=0.1, help="how often the scripted player wanders off")
+    parser.add_argument("--zombies", type=int, help="override the difficulty's zombie count")
+    parser.add_argument("--resources", type=int, help="override the difficulty's resource count")
+    parser.add_argument("--output", help="write one JSON line per game here as they finish")
+    args = parser.parse_args()
+
+    # Every difficulty plays the same seeds, interleaved so partial runs stay comparable
+    tasks = [(difficulty, args.seed + i, args.max_ticks, args.wander, args.zombies, args.resources)
+             for i in range(args.games) for difficulty in args.difficulties]
+
+    output = open(args.output, "w") if args.output else None
+    results = []
+    start = time.perf_counter()
+    try:
+        for result in run_batch(tasks, max(args.workers, 1)):
+            results.append(result)
+            if output:
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+            if len(results) % 50 == 0:
+                print(f"  {len(results)}/{len(tasks)} games", file=sys.stderr)
+    finally:
+        if output:
+            output.close()
+    seconds = time.perf_counter() - start
+
+    ticks = sum(result["ticks"] for result in results)
+    print(f"{len(results)} games, {ticks} ticks in {seconds:.1f} s with {args.workers} workers "
+          f"({len(results) / max(seconds, 1e-9):.1f} games/s, {ticks / max(seconds, 1e-9):.0f} ticks/s)")
+    print(f"{'difficulty':<10} {'games':>6} {'win':>6} {'death':>6} {'ticks':>8} {'damage':>7} "
+          f"{'items':>6} {'tick ms':>8} {'worst ms':>9}")
+    for difficulty, stats in summarise(results).items():
+        print(f"{difficulty:<10} {stats['games']:>6} {stats['win_rate']:>6.1%} {stats['death_rate']:>6.1%} "
+              f"{stats['mean_ticks']:>8.0f} {stats['mean_damage']:>7.1f} {stats['mean_items']:>6.2f} "
+              f"{stats['mean_tick_ms']:>8.3f} {stats['worst_tick_ms']:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# Headless benchmark suite for the simulation, renderer, pathfinding and map generation.
+#
+#   python benchmark.py                      # run the sweep, write bench_results.json
+#   python benchmark.py --save-baseline      # also store the results as the baseline
+#   python benchmark.py --quick              # smaller sweep for a fast check
+#
+# When a baseline file exists every case is compared against it and the script
+# exits with status 1 if any case's median got slower than the tolerance allows.
+import os
+
+# Render into an off-screen dummy window, never a real one
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+
+from Game import Game
+from game_states import GameState
+from inputs import InputState
+
+
+ZOMBIE_COUNTS = [10, 100, 500]
+RESOURCE_COUNTS = [10, 100]
+MAP_SIZES = [(800, 600), (1600, 1200)]
+
+QUICK_ZOMBIE_COUNTS = [10, 100]
+QUICK_RESOURCE_COUNTS = [10]
+QUICK_MAP_SIZES = [(800, 600)]
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pick(q):
+        return ordered[min(n - 1, int(q * n))] * 1000
+
+    return {
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "mean_ms": sum(ordered) / n * 1000,
+        "samples": n,
+    }
+
+
+def scripted_inputs(rng):
+    # A wandering player: holds a direction for a while, sometimes sprinting
+    while True:
+        inputs = InputState(rng.choice([-1, 0, 1]), rng.choice([-1, 0, 1]), rng.random() < 0.3)
+        for _ in range(rng.randint(10, 60)):
+            yield inputs
+
+
+def make_game(zombies, resources, map_size, render=False, seed=None):
+    game = Game("normal", headless=not render, audio=False, map_size=map_size, seed=seed)
+    # A wall-clock AI budget would make the work per tick depend on the machine's load
+    # and turn a slower Zombie.act into deferred thinking instead of a slower tick
+    game.ai_budget_ms = None
+    game.zombie_count = zombies
+    game.resource_count = resources
+    game.state = GameState.PLAYING
+    game.init_game()
+    return game
+
+
+def restart_if_over(game):
+    # Runs that end early start a new map; the restart itself is not timed
+    if game.state != GameState.PLAYING:
+        game.state = GameState.PLAYING
+        game.init_game()
+
+
+def bench_update_game(config, ticks, seed):
+    # update_game is step() fed from the keyboard; feed it scripted input instead
+    game = make_game(*config, seed=seed)
+    inputs = scripted_inputs(random.Random(seed))
+    samples = []
+    for _ in range(ticks):
+        tick_inputs = next(inputs)
+        start = time.perf_counter()
+        game.step(tick_inputs)
+        samples.append(time.perf_counter() - start)
+        restart_if_over(game)
+    return samples
+
+
+def bench_draw_game(config, ticks, seed):
+    game = make_game(*config, render=True, seed=seed)
+    inputs = scripted_inputs(random.Random(seed))
+    samples = []
+    for _ in range(ticks):
+        game.step(next(inputs))
+        restart_if_over(game)
+        start = time.perf_counter()
+        game.draw_game()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_find_path(config, ticks, seed):
+    game = make_game(*config, seed=seed)
+    goal = game.player.get_grid_pos()
+    samples = []
+    for zombie in itertools.islice(itertools.cycle(game.zombies), ticks):
+        start = time.perf_counter()
+        zombie.find_path_to_player(zombie.get_grid_pos(), goal, game.grid)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_generate_map(config, repeats, seed):
+    # The map and spawn plan init_game builds a game from (WorldSpec.plan)
+    zombies, resources, _ = config
+    game = make_game(*config, seed=seed)
+    samples = []
+    for _ in range(repeats):
+        world_seed = game.next_seed()
+        start = time.perf_counter()
+        game.world_spec.plan(world_seed, zombies, resources)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_init_game(config, repeats, seed):
+    game = make_game(*config, seed=seed)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        game.init_game()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+CASES = [
+    ("update_game", bench_update_game, "ticks"),
+    ("draw_game", bench_draw_game, "ticks"),
+    ("find_path_to_player", bench_find_path, "ticks"),
+    ("generate_map", bench_generate_map, "repeats"),
+    ("init_game", bench_init_game, "repeats"),
+]
+
+
+def run_suite(args):
+    if args.quick:
+        sweep = itertools.product(QUICK_ZOMBIE_COUNTS, QUICK_RESOURCE_COUNTS, QUICK_MAP_SIZES)
+    else:
+        sweep = itertools.product(ZOMBIE_COUNTS, RESOURCE_COUNTS, MAP_SIZES)
+
+    results = {}
+    for zombies, resources, map_size in sweep:
+        config = (zombies, resources, map_size)
+        label = f"z={zombies},r={resources},map={map_size[0]}x{map_size[1]}"
+        for name, bench, unit in CASES:
+            if args.only and name not in args.only:
+                continue
+            count = args.ticks if unit == "ticks" else args.repeats
+            stats = percentiles(bench(config, count, args.seed))
+            key = f"{name}[{label}]"
+            results[key] = stats
+            print(f"{key:<60} p50 {stats['p50_ms']:8.3f} ms  p95 {stats['p95_ms']:8.3f} ms  "
+                  f"p99 {stats['p99_ms']:8.3f} ms")
+    return results
+
+
+def compare(results, baseline, tolerance, min_ms):
+    # A case regresses when its median is slower than the baseline by more than
+    # the tolerance, ignoring differences too small to be measured reliably
+    regressions = []
+    for key, stats in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        limit = base["p50_ms"] * (1 + tolerance)
+        if stats["p50_ms"] > limit and stats["p50_ms"] - base["p50_ms"] > min_ms:
+            regressions.append((key, base["p50_ms"], stats["p50_ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zombie Escape benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="run a reduced sweep")
+    parser.add_argument("--ticks", type=int, default=300, help="samples per per-tick case")
+    parser.add_argument("--repeats", type=int, default=20, help="samples per map generation case")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--only", nargs="*", help="case names to run (default: all)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default="bench_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-ms", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "ticks": args.ticks,
+            "repeats": args.repeats,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance, args.min_ms)
+    if regressions:
+        print(f"PERFORMANCE REGRESSION: {len(regressions)} case(s) slower than baseline")
+        for key, before, after in regressions:
+            print(f"  {key}: p50 {before:.3f} ms -> {after:.3f} ms ({after / before - 1:+.0%})")
+        return 1
+
+    print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+import pygame
+
+
+class Camera:
+    # Scrolling view onto the world; follows a target and stays inside the world
+    def __init__(self, view_width, view_height, world_width, world_height):
+        self.rect = pygame.Rect(0, 0, view_width, view_height)
+        self.bounds = pygame.Rect(0, 0, world_width, world_height)
+
+    def follow(self, target_rect):
+        self.rect.center = target_rect.center
+        self.rect.clamp_ip(self.bounds)
+
+    @property
+    def offset(self):
+        return self.rect.x, self.rect.y
+
+    def is_visible(self, rect):
+        return self.rect.colliderect(rect)
@@ -0,0 +1,51 @@
+from settings import TILE_SIZE
+
+
+class CollisionWorld:
+    def __init__(self, grid, tile_size=TILE_SIZE):
+        # Obstacles are tile aligned, so the occupancy grid is the whole collision world
+        self.grid = grid
+        self.tile_size = tile_size
+        self.height = grid.height
+        self.width = grid.width
+
+    def hits(self, rect):
+        # Only look at the cells the rect overlaps. The grid covers the whole map,
+        # so anything reaching past its edge is blocked.
+        tile = self.tile_size
+        left = rect.left // tile
+        right = (rect.right - 1) // tile
+        top = rect.top // tile
+        bottom = (rect.bottom - 1) // tile
+        width = self.width
+        if left < 0 or top < 0 or right >= width or bottom >= self.height:
+            return True
+
+        data = self.grid.data
+        for y in range(top, bottom + 1):
+            row = y * width
+            for x in range(left + row, right + row + 1):
+                if data[x]:
+                    return True
+        return False
+
+    def move_and_slide(self, rect, dx, dy):
+        # Move the rect in place one axis at a time, undoing any axis that hits a wall.
+        # Returns (blocked_x, blocked_y).
+        blocked_x = blocked_y = False
+
+        if dx:
+            old_x = rect.x
+            rect.x += dx
+            if self.hits(rect):
+                rect.x = old_x
+                blocked_x = True
+
+        if dy:
+            old_y = rect.y
+            rect.y += dy
+            if self.hits(rect):
+                rect.y = old_y
+                blocked_y = True
+
+        return blocked_x, blocked_y
@@ -0,0 +1,48 @@
+class FlowField:
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.goal = None
+        self.grid = None
+        # World cell of the grid's top-left cell (OccupancyGrid.origin)
+        self.origin = (0, 0)
+        # Flat list of BFS step counts to the goal, -1 for walls / unreachable cells
+        self.distances = []
+
+    def update(self, goal, grid):
+        # Only rebuild when the goal cell moved or the map was regenerated
+        if goal == self.goal and grid is self.grid:
+            return False
+        self.compute(goal, grid)
+        return True
+
+    def compute(self, goal, grid):
+        # Reverse Breadth-First Search from the player's cell over the occupancy grid
+        self.goal = goal
+        self.grid = grid
+        self.origin = grid.origin
+        self.width, self.height = grid.width, grid.height
+        self.distances = grid.distance_field((goal[0] - self.origin[0], goal[1] - self.origin[1]))
+
+    def distance(self, cell):
+        x, y = cell[0] - self.origin[0], cell[1] - self.origin[1]
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.distances[y * self.width + x]
+        return -1
+
+    def next_cell(self, cell):
+        # Follow the gradient: step to the neighbour closest to the goal
+        current = self.distance(cell)
+        if current <= 0:
+            return None
+
+        x, y = cell
+        best = None
+        best_dist = current
+        for dx, dy in ((0, 1), (1, 0), (0, -1), (-1, 0)):
+            neighbour = (x + dx, y + dy)
+            dist = self.distance(neighbour)
+            if 0 <= dist < best_dist:
+                best = neighbour
+                best_dist = dist
+        return best
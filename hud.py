@@ -0,0 +1,98 @@
+import pygame
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, RED, GREEN, GRAY, YELLOW
+from game_states import ResourceType
+from asset_manager import assets
+
+
+PANEL_WIDTH = 220
+PANEL_COLOR = (50, 50, 50)
+
+
+class TextCache:
+    # Rendered text surfaces for one font, keyed by (text, color). Labels like
+    # the "x3" inventory counts only ever take a handful of values.
+    def __init__(self, font):
+        self.font = font
+        self.surfaces = {}
+
+    def render(self, text, color=WHITE):
+        surface = self.surfaces.get((text, color))
+        if surface is None:
+            surface = self.surfaces[(text, color)] = self.font.render(text, True, color)
+        return surface
+
+
+class Hud:
+    # The side panel, kept as one surface and only redrawn when something shown
+    # on it changes: a bar's pixel width, an inventory count, the weather or the
+    # danger flag
+    def __init__(self, font, small_font):
+        self.rect = pygame.Rect(SCREEN_WIDTH - PANEL_WIDTH, 0, PANEL_WIDTH, SCREEN_HEIGHT)
+        self.surface = pygame.Surface(self.rect.size).convert()
+        self.text = TextCache(font)
+        self.small_text = TextCache(small_font)
+        self.shown = None  # What the surface currently shows
+
+    def draw(self, screen, player, weather, danger, force=False):
+        # Blits the panel; returns True if it had to be rebuilt
+        shown = (
+            int(160 * (player.health / player.max_health)),
+            int(160 * (player.stamina / player.max_stamina)),
+            tuple(player.inventory[res_type] for res_type in ResourceType),
+            weather,
+            danger,
+        )
+        rebuilt = shown != self.shown
+        if rebuilt:
+            # Stamina creeps every tick while it recovers, so bar-only changes
+            # skip redrawing the icons and text
+            if self.shown is not None and shown[2:] == self.shown[2:]:
+                self.draw_bars(shown[0], shown[1])
+            else:
+                self.rebuild(*shown)
+            self.shown = shown
+        if rebuilt or force:
+            screen.blit(self.surface, self.rect)
+        return rebuilt
+
+    def rebuild(self, health_width, stamina_width, counts, weather, danger):
+        panel = self.surface
+        panel.fill(PANEL_COLOR)
+
+        # Icons come from the asset cache (decoded and scaled once)
+        health_icon = assets.get("assets/medkit.png", (25, 25))
+        stamina_icon = assets.get("assets/medkit.png", (25, 25))
+        inventory_icon = assets.get("assets/food.png", (25, 25))
+        weather_icon = assets.get("assets/food.png", (25, 25))
+        danger_icon = assets.get("assets/zombie.png", (40, 40))
+
+        # Health and stamina bars with icons
+        panel.blit(health_icon, (10, 10))
+        panel.blit(stamina_icon, (10, 45))
+        self.draw_bars(health_width, stamina_width)
+
+        # Inventory section with icons
+        panel.blit(inventory_icon, (10, 85))
+        panel.blit(self.text.render("Inventory:"), (40, 85))
+
+        y_offset = 120
+        for res_type, count in zip(ResourceType, counts):
+            item_image = assets.get(f"assets/{res_type.name.lower()}.png", (30, 30))
+            panel.blit(item_image, (10, y_offset))
+            panel.blit(self.small_text.render(f"x{count}"), (50, y_offset + 5))
+            y_offset += 40
+
+        # Weather indicator with an image
+        panel.blit(weather_icon, (10, SCREEN_HEIGHT - 80))
+        panel.blit(self.small_text.render(weather.capitalize()), (50, SCREEN_HEIGHT - 75))
+
+        # Zombie proximity indicator
+        if danger:
+            panel.blit(danger_icon, (10, SCREEN_HEIGHT - 40))
+
+    def draw_bars(self, health_width, stamina_width):
+        panel = self.surface
+        pygame.draw.rect(panel, RED, (40, 15, 160, 20))  # Background bar
+        pygame.draw.rect(panel, GREEN, (40, 15, health_width, 20))  # Filled bar
+        pygame.draw.rect(panel, GRAY, (40, 50, 160, 15))  # Background bar
+        pygame.draw.rect(panel, YELLOW, (40, 50, stamina_width, 15))  # Filled bar
@@ -0,0 +1,58 @@
+import pygame
+from game_states import ResourceType
+
+
+# Number keys 1-5 use these items, checked in this order every tick
+ITEM_KEYS = [
+    (pygame.K_1, ResourceType.FOOD),
+    (pygame.K_2, ResourceType.WATER),
+    (pygame.K_3, ResourceType.MEDKIT),
+    (pygame.K_4, ResourceType.FLASHBANG),
+    (pygame.K_5, ResourceType.TRAP),
+]
+
+
+class InputState:
+    # Everything the player can do in one simulation tick
+    def __init__(self, dx=0, dy=0, sprint=False, use_items=()):
+        self.dx = dx  # -1, 0 or 1
+        self.dy = dy  # -1, 0 or 1
+        self.sprint = sprint
+        self.use_items = frozenset(use_items)
+
+    @classmethod
+    def from_keys(cls, keys):
+        dx, dy = 0, 0
+
+        # Movement with W, A, S, D or Arrow Keys
+        if keys[pygame.K_w] or keys[pygame.K_UP]:
+            dy = -1
+        if keys[pygame.K_s] or keys[pygame.K_DOWN]:
+            dy = 1
+        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
+            dx = -1
+        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
+            dx = 1
+
+        # Sprint with Shift key
+        sprint = bool(keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT])
+
+        use_items = [res_type for key, res_type in ITEM_KEYS if keys[key]]
+        return cls(dx, dy, sprint, use_items)
+
+    def pack(self):
+        # 10-bit code for recordings: dx and dy (2 bits each), sprint, one bit per item key
+        code = (self.dx + 1) | (self.dy + 1) << 2 | int(self.sprint) << 4
+        for bit, (_, res_type) in enumerate(ITEM_KEYS):
+            if res_type in self.use_items:
+                code |= 1 << (5 + bit)
+        return code
+
+    @classmethod
+    def unpack(cls, code):
+        use_items = [res_type for bit, (_, res_type) in enumerate(ITEM_KEYS) if code >> (5 + bit) & 1]
+        return cls((code & 3) - 1, (code >> 2 & 3) - 1, bool(code >> 4 & 1), use_items)
+
+
+# Standing still, doing nothing
+NO_INPUT = InputState()
@@ -1,46 +1,148 @@
+import time
+IMPORT_START = time.perf_counter()  # Start of the cold-start timings
+
 import pygame
 import sys 
+import os
+import argparse
 from Game import Game
 from game_states import GameState
+from snapshot import save_snapshot, load_snapshot
+from profiler import StartupTimer
+from settings import WORLD_WIDTH, WORLD_HEIGHT, SIM_RATE, MAX_FPS, MAX_CATCH_UP_STEPS
+
 
+SIM_STEP = 1.0 / SIM_RATE  # Seconds of game time per tick
 
-clock = pygame.time.Clock()
+def run_ticks(game, accumulator):
+    # Fixed-timestep catch up: one tick per SIM_STEP of real time that has
+    # passed. Returns the leftover time, which is less than one tick.
+    steps = 0
+    while accumulator >= SIM_STEP and game.state == GameState.PLAYING:
+        game.update_game()
+        accumulator -= SIM_STEP
+        steps += 1
+        if steps == MAX_CATCH_UP_STEPS:
+            # Too far behind (a long hitch): drop the backlog rather than
+            # spending every following frame catching up
+            accumulator %= SIM_STEP
+            break
+    return accumulator
+
+def run_unthrottled(game, budget):
+    # Soak testing: as many ticks as fit in the budget, then one frame
+    deadline = time.perf_counter() + budget
+    ticks = 0
+    while game.state == GameState.PLAYING and time.perf_counter() < deadline:
+        game.update_game()
+        ticks += 1
+    return ticks
 
 def main():
-    game = Game()
+    parser = argparse.ArgumentParser(description="Zombie Escape")
+    parser.add_argument("--large-world", action="store_true", help="play on a scrolling world many screens across")
+    parser.add_argument("--seed", type=int, help="seed for reproducible games")
+    parser.add_argument("--record", metavar="PATH", help="save each session's inputs for replay.py: the first here, later ones as PATH-2, PATH-3, ...")
+    parser.add_argument("--unthrottled", action="store_true", help="run the simulation as fast as possible (soak tests)")
+    parser.add_argument("--snapshot", metavar="PATH", default="quicksave.zsnap",
+                        help="where F5 saves and F9 loads the game in progress")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print where the cold start spent its time when the game exits")
+    args = parser.parse_args()
+    startup = StartupTimer(IMPORT_START)
+    startup.mark("imports")
+    
+    world_size = (WORLD_WIDTH, WORLD_HEIGHT) if args.large_world else None
+    game = Game(world_size=world_size, seed=args.seed, startup=startup)
+    game.record_path = args.record
+    # Upcoming worlds are generated in the background so (re)starts don't hitch
+    game.start_pregenerator()
+    startup.mark("game setup")
+    clock = pygame.time.Clock()
     running = True
+    accumulator = 0.0
+    soak_ticks = 0
+    soak_start = time.perf_counter()
+    last_frame = time.perf_counter()
     
     while running:
+        now = time.perf_counter()
+        frame_time = now - last_frame
+        last_frame = now
+        
         # Handle events
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             
+            # Toggle the frame profiler overlay
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                game.profiler.toggle()
+                game.full_redraw = True  # Clears the overlay when it is switched off
+            
+            # Quick save / quick load of the game in progress (classic map only)
+            if event.type == pygame.KEYDOWN and not game.streaming:
+                if event.key == pygame.K_F5 and game.state == GameState.PLAYING:
+                    save_snapshot(game, args.snapshot)
+                elif event.key == pygame.K_F9 and os.path.exists(args.snapshot):
+                    try:
+                        saved_recording = load_snapshot(game, args.snapshot)
+                        if saved_recording:
+                            print(f"Recording saved to {saved_recording}; the loaded game is not recorded",
+                                  file=sys.stderr)
+                    except ValueError as error:
+                        # The game in progress carries on untouched
+                        print(f"Could not load {args.snapshot}: {error}", file=sys.stderr)
+                    accumulator = 0.0
+            
             # Handle menu events
             if game.state != GameState.PLAYING:
                 game.handle_menu_event(event)
         
         # Update game state
+        alpha = 1.0
         if game.state == GameState.PLAYING:
-            game.update_game()
+            if args.unthrottled:
+                soak_ticks += run_unthrottled(game, 1.0 / MAX_FPS)
+            else:
+                accumulator = run_ticks(game, accumulator + frame_time)
+                alpha = accumulator / SIM_STEP
+        else:
+            # Time spent in menus doesn't carry into the next game
+            accumulator = 0.0
         
-        # Render game
+        # Render game, interpolated between the last two ticks
+        dirty_rects = []
         if game.state == GameState.PLAYING:
-            game.draw_game()
+            dirty_rects = game.draw_game(alpha)
         elif game.state == GameState.MAIN_MENU:
-            game.draw_main_menu()
+            dirty_rects = game.draw_main_menu()
         elif game.state == GameState.SETTINGS:
-            game.draw_settings_menu()
+            dirty_rects = game.draw_settings_menu()
         elif game.state == GameState.GAME_OVER:
-            game.draw_game_over()
+            dirty_rects = game.draw_game_over()
         elif game.state == GameState.WIN:
-            game.draw_win_screen()
+            dirty_rects = game.draw_win_screen()
         
-        # Update display
-        pygame.display.flip()
-        game.time_elapsed += 1
-        clock.tick(60)
+        # Update display (only the regions that changed)
+        pygame.display.update(dirty_rects)
+        # Sounds asked for since the last frame start with it
+        if game.audio is not None:
+            game.audio.update()
+        if game.frame_count == 0:
+            startup.mark("first frame")
+        game.frame_count += 1
+        if not args.unthrottled:
+            clock.tick(MAX_FPS)
+    
+    if args.unthrottled:
+        seconds = time.perf_counter() - soak_start
+        print(f"Soak: {soak_ticks} ticks in {seconds:.1f} s ({soak_ticks / max(seconds, 1e-9):.0f} ticks/s)")
+    if args.startup_report:
+        print(game.startup.report())
     
+    # Keep the session in progress when the window is closed mid-game
+    game.save_recording()
     pygame.quit()
     sys.exit()
 
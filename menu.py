@@ -0,0 +1,55 @@
+import pygame
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, GRAY, GREEN
+
+
+BUTTON_WIDTH = 200
+BUTTON_HEIGHT = 50
+BUTTON_SPACING = 70
+
+
+class Menu:
+    # One menu screen. Layout, title and button labels are built once; the
+    # finished screen is kept per highlighted button, and clicks are hit-tested
+    # against the stored rects without drawing anything.
+    def __init__(self, background, title, title_color, title_y, buttons, first_button_y,
+                 title_font, font):
+        self.background = background
+        self.title = title_font.render(title, True, title_color)
+        self.title_pos = (SCREEN_WIDTH // 2 - self.title.get_width() // 2, title_y)
+
+        # (action, rect, label) per button, top to bottom
+        self.buttons = []
+        button_x = SCREEN_WIDTH // 2 - BUTTON_WIDTH // 2
+        for i, (action, label) in enumerate(buttons):
+            rect = pygame.Rect(button_x, first_button_y + BUTTON_SPACING * i, BUTTON_WIDTH, BUTTON_HEIGHT)
+            self.buttons.append((action, rect, font.render(label, True, WHITE)))
+
+        self.layers = {}  # Highlighted action -> finished screen
+        self.overlay = None  # Title and buttons only, see draw_over
+
+    def hit(self, pos):
+        # Action of the button under pos, or None
+        for action, rect, _ in self.buttons:
+            if rect.collidepoint(pos):
+                return action
+        return None
+
+    def layer(self, selected=None):
+        surface = self.layers.get(selected)
+        if surface is None:
+            surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+            surface.fill(self.background)
+            surface.blit(self.title, self.title_pos)
+            for action, rect, label in self.buttons:
+                pygame.draw.rect(surface, GREEN if action == selected else GRAY, rect)
+                surface.blit(label, (rect.centerx - label.get_width() // 2,
+                                     rect.centery - label.get_height() // 2))
+            self.layers[selected] = surface
+        return surface
+
+    def draw_over(self, screen, rect):
+        # Puts the title and buttons back on top of whatever was drawn in rect
+        if self.overlay is None:
+            self.overlay = self.layer().copy()
+            self.overlay.set_colorkey(self.background)
+        screen.blit(self.overlay, rect, rect)
@@ -0,0 +1,103 @@
+import numpy as np
+from settings import TILE_SIZE, NOISE_DECAY, NOISE_FALLOFF
+
+
+# Neighbour offsets in the down, right, up, left order the grid searches use
+DIRECTIONS = np.array([(0, 1), (1, 0), (0, -1), (-1, 0)], dtype=np.int8)
+
+
+class NoiseField:
+    # How loud it is in every cell of the occupancy grid. A source raises its
+    # cell to its loudness; every tick each open cell keeps the louder of its
+    # own level minus the decay and its loudest neighbour's minus the falloff.
+    # So noise spreads a cell per tick, weakens with the walking distance
+    # around walls and dies out once its source goes quiet. Walls carry none.
+    # A tick is a handful of whole-array operations and listening is one
+    # lookup per zombie, however many zombies there are.
+    def __init__(self, decay=NOISE_DECAY, falloff=NOISE_FALLOFF):
+        self.decay = decay
+        self.falloff = falloff
+        self.reset()
+
+    def reset(self):
+        self.grid = None
+        self.origin = (0, 0)
+        # levels is a view into padded, whose silent border lets every cell
+        # read its neighbours without bounds checks
+        self.padded = np.zeros((2, 2), dtype=np.float32)
+        self.levels = self.padded[1:-1, 1:-1]
+        self.open = self.levels  # 1 for open cells, 0 for walls
+        self.spread = self.levels  # Scratch space for step()
+
+    def track(self, grid):
+        # Follows the game onto a new grid (a streamed window that moved),
+        # keeping the levels of the cells both grids cover
+        if grid is self.grid:
+            return
+        padded = np.zeros((grid.height + 2, grid.width + 2), dtype=np.float32)
+        levels = padded[1:-1, 1:-1]
+        if self.grid is not None:
+            # Old cell (x, y) is new cell (x + ox, y + oy)
+            ox, oy = self.origin[0] - grid.origin[0], self.origin[1] - grid.origin[1]
+            height, width = self.levels.shape
+            x0, y0 = max(ox, 0), max(oy, 0)
+            x1, y1 = min(ox + width, grid.width), min(oy + height, grid.height)
+            if x0 < x1 and y0 < y1:
+                levels[y0:y1, x0:x1] = self.levels[y0 - oy:y1 - oy, x0 - ox:x1 - ox]
+        self.grid = grid
+        self.origin = grid.origin
+        self.padded = padded
+        self.levels = levels
+        self.open = (grid.cells == 0).astype(np.float32)
+        self.spread = np.empty_like(levels)
+
+    def cell_of(self, position):
+        return (int(position[0]) // TILE_SIZE - self.origin[0], int(position[1]) // TILE_SIZE - self.origin[1])
+
+    def emit(self, position, loudness):
+        # A sound at a point (in pixels); quieter than what is already there, it changes nothing
+        x, y = self.cell_of(position)
+        height, width = self.levels.shape
+        if 0 <= x < width and 0 <= y < height and loudness > self.levels[y, x]:
+            self.levels[y, x] = loudness
+
+    def step(self):
+        padded, levels, spread = self.padded, self.levels, self.spread
+        if levels.size == 0:
+            return
+        # Loudest of the four neighbours of every cell
+        np.maximum(padded[2:, 1:-1], padded[1:-1, 2:], out=spread)
+        np.maximum(spread, padded[:-2, 1:-1], out=spread)
+        np.maximum(spread, padded[1:-1, :-2], out=spread)
+        spread -= self.falloff
+        levels -= self.decay
+        np.maximum(levels, spread, out=levels)
+        np.maximum(levels, 0, out=levels)
+        levels *= self.open
+
+    def listen(self, positions):
+        # For each position (pixels, one row each): the noise level of its
+        # cell, and the step (dx, dy) towards the loudest neighbouring cell
+        # if one is louder, else (0, 0). Off the grid is silent.
+        count = len(positions)
+        heard = np.zeros(count, dtype=np.float32)
+        headings = np.zeros((count, 2), dtype=np.int8)
+        if count == 0 or self.levels.size == 0:
+            return heard, headings
+        height, width = self.levels.shape
+        cells = (np.asarray(positions) // TILE_SIZE).astype(np.intp) - self.origin
+        xs, ys = cells[:, 0], cells[:, 1]
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        # Flat indices into padded, whose border keeps every neighbour in bounds
+        stride = width + 2
+        flat = self.padded.ravel()
+        index = (np.clip(ys, 0, height - 1) + 1) * stride + np.clip(xs, 0, width - 1) + 1
+        heard[inside] = flat[index[inside]]
+        # The first of the loudest neighbours, when it is louder than the cell itself
+        loudest = heard.copy()
+        for direction, offset in zip(DIRECTIONS, (stride, 1, -stride, -1)):
+            level = flat[index + offset]
+            louder = inside & (level > loudest)
+            loudest[louder] = level[louder]
+            headings[louder] = direction
+        return heard, headings
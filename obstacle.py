@@ -1,65 +1,64 @@
 import pygame
 from settings import TILE_SIZE
 from game_states import ResourceType
+from asset_manager import assets
 
 
+# Image per obstacle / resource type, shared by every instance
+OBSTACLE_IMAGES = {
+    "wall": "assets/wall.png",
+    "tree": "assets/tree.png",
+    "fence": "assets/fence.png",
+    "rock": "assets/rock.png",
+}
+RESOURCE_IMAGES = {
+    ResourceType.FOOD: "assets/food.png",
+    ResourceType.WATER: "assets/water.png",
+    ResourceType.MEDKIT: "assets/medkit.png",
+    ResourceType.WEAPON: "assets/weapon.png",
+    ResourceType.FLASHBANG: "assets/flashbang.png",
+    ResourceType.TRAP: "assets/trap.png",
+}
+
 
 class Obstacle:
+    __slots__ = ("rect", "type")
+
     def __init__(self, x, y, width, height, obstacle_type="wall"):
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
+        self.rect = pygame.Rect(x, y, width, height)
         self.type = obstacle_type
-        self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
 
-        # Load images based on obstacle type
-        if obstacle_type == "wall":
-            self.image = pygame.image.load("assets/wall.png").convert_alpha()
-        elif obstacle_type == "tree":
-            self.image = pygame.image.load("assets/tree.png").convert_alpha()
-        elif obstacle_type == "fence":
-            self.image = pygame.image.load("assets/fence.png").convert_alpha()
-        elif obstacle_type == "rock":
-            self.image = pygame.image.load("assets/rock.png").convert_alpha()
-        else:
-            self.image = pygame.image.load("assets/default.png").convert_alpha()  # Default image
-        
-        # Scale image to match obstacle size
-        self.image = pygame.transform.scale(self.image, (self.width, self.height))
+    def reset(self, x, y, width, height, obstacle_type="wall"):
+        # Re-initialise in place, for obstacles recycled through a Pool
+        self.rect.update(x, y, width, height)
+        self.type = obstacle_type
 
-    def draw(self, screen):
-        screen.blit(self.image, self.rect.topleft)
+    @property
+    def image_path(self):
+        return OBSTACLE_IMAGES.get(self.type, "assets/default.png")
+
+    def draw(self, screen, offset=(0, 0)):
+        screen.blit(assets.get(self.image_path, self.rect.size),
+                    (self.rect.x - offset[0], self.rect.y - offset[1]))
         
         
 class Resource:
+    __slots__ = ("rect", "type")
+    width = TILE_SIZE // 2
+    height = TILE_SIZE // 2
+
     def __init__(self, x, y, resource_type):
-        self.x = x
-        self.y = y
+        self.rect = pygame.Rect(x, y, self.width, self.height)
         self.type = resource_type
-        self.width = TILE_SIZE // 2
-        self.height = TILE_SIZE // 2
-        self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
 
-        # Load resource images based on type
-        if resource_type == ResourceType.FOOD:
-            self.image = pygame.image.load("assets/food.png").convert_alpha()
-        elif resource_type == ResourceType.WATER:
-            self.image = pygame.image.load("assets/water.png").convert_alpha()
-        elif resource_type == ResourceType.MEDKIT:
-            self.image = pygame.image.load("assets/medkit.png").convert_alpha()
-        elif resource_type == ResourceType.WEAPON:
-            self.image = pygame.image.load("assets/weapon.png").convert_alpha()
-        elif resource_type == ResourceType.FLASHBANG:
-            self.image = pygame.image.load("assets/flashbang.png").convert_alpha()
-        elif resource_type == ResourceType.TRAP:
-            self.image = pygame.image.load("assets/trap.png").convert_alpha()
-        else:
-            self.image = pygame.image.load("assets/default_resource.png").convert_alpha()  # Default image
-        
-        # Scale the image to match the resource size
-        self.image = pygame.transform.scale(self.image, (self.width, self.height))
+    def reset(self, x, y, resource_type):
+        self.rect.topleft = (x, y)
+        self.type = resource_type
 
-    def draw(self, screen):
-        screen.blit(self.image, self.rect.topleft)
+    @property
+    def image_path(self):
+        return RESOURCE_IMAGES.get(self.type, "assets/default_resource.png")
 
+    def draw(self, screen, offset=(0, 0)):
+        screen.blit(assets.get(self.image_path, (self.width, self.height)),
+                    (self.rect.x - offset[0], self.rect.y - offset[1]))
@@ -0,0 +1,106 @@
+from collections import deque
+import numpy as np
+
+
+class OccupancyGrid:
+    # Walkability of a map, one byte per cell (non-zero = blocked), row-major.
+    # `cells` is a (height, width) NumPy view of the same bytes as `data`, which
+    # the hot per-cell lookups index directly. The free-cell list and component
+    # labels are worked out once, the first time they are asked for.
+    def __init__(self, cells, origin=(0, 0)):
+        cells = np.asarray(cells)
+        self.height, self.width = cells.shape
+        self.data = bytearray(cells.astype(np.uint8).tobytes())
+        self.cells = np.frombuffer(self.data, dtype=np.uint8).reshape(self.height, self.width)
+        # World cell of cells[0, 0], for grids that are a window onto a larger world
+        self.origin = origin
+        self._free_cells = None
+        self._labels = None
+
+    @classmethod
+    def empty(cls, width, height):
+        return cls(np.zeros((height, width), dtype=np.uint8))
+
+    def blocked(self, x, y):
+        # In grid coordinates; everything off the grid is blocked
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.data[y * self.width + x] != 0
+        return True
+
+    @property
+    def free_cells(self):
+        # Flat indices (y * width + x) of every open cell
+        if self._free_cells is None:
+            self._free_cells = np.flatnonzero(self.cells.ravel() == 0)
+        return self._free_cells
+
+    def cell_at(self, index):
+        return (index % self.width, index // self.width)
+
+    def neighbours(self, index):
+        # Flat indices of the 4-connected cells next to index that are on the grid,
+        # in the down, right, up, left order the BFS searches have always used
+        width = self.width
+        x = index % width
+        result = []
+        if index + width < len(self.data):
+            result.append(index + width)
+        if x < width - 1:
+            result.append(index + 1)
+        if index >= width:
+            result.append(index - width)
+        if x > 0:
+            result.append(index - 1)
+        return result
+
+    def distance_field(self, start):
+        # BFS step counts from the start cell (grid coordinates) as a flat list,
+        # -1 for walls and cells that can't be reached
+        width, height, data = self.width, self.height, self.data
+        distances = [-1] * (width * height)
+        x, y = start
+        if not (0 <= x < width and 0 <= y < height) or data[y * width + x]:
+            return distances
+
+        start_index = y * width + x
+        distances[start_index] = 0
+        queue = deque([start_index])
+        while queue:
+            index = queue.popleft()
+            next_dist = distances[index] + 1
+            for neighbour in self.neighbours(index):
+                if distances[neighbour] < 0 and not data[neighbour]:
+                    distances[neighbour] = next_dist
+                    queue.append(neighbour)
+        return distances
+
+    @property
+    def labels(self):
+        # Connected-component label per cell (flat), -1 for walls. Components
+        # are numbered from 0 in order of their first cell.
+        if self._labels is None:
+            width, data = self.width, self.data
+            labels = [-1] * (width * self.height)
+            component = 0
+            for start in self.free_cells.tolist():
+                if labels[start] >= 0:
+                    continue
+                labels[start] = component
+                stack = [start]
+                while stack:
+                    index = stack.pop()
+                    for neighbour in self.neighbours(index):
+                        if labels[neighbour] < 0 and not data[neighbour]:
+                            labels[neighbour] = component
+                            stack.append(neighbour)
+                component += 1
+            self._labels = np.array(labels, dtype=np.int32)
+        return self._labels
+
+    def largest_component(self):
+        # Flat indices of the cells in the biggest connected open area
+        labels = self.labels
+        open_labels = labels[labels >= 0]
+        if len(open_labels) == 0:
+            return open_labels
+        return np.flatnonzero(labels == np.bincount(open_labels).argmax())
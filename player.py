@@ -1,12 +1,14 @@
 import pygame
 from settings import TILE_SIZE, MAP_HEIGHT ,MAP_WIDTH ,RED, GREEN, GRAY , YELLOW
 from game_states import ResourceType
+from asset_manager import assets
 
 
 class Player:
-    def __init__(self, x, y):
+    def __init__(self, x, y, map_size=(MAP_WIDTH, MAP_HEIGHT)):
         self.x = x
         self.y = y
+        self.map_width, self.map_height = map_size
         self.width = TILE_SIZE - 10
         self.height = TILE_SIZE - 10
         self.speed = 5
@@ -21,22 +23,14 @@ class Player:
         self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
         self.last_noise_level = 0
         self.noise_cooldown = 0
-         # Load images
-        self.image_idle = pygame.image.load("assets/player_idle.png").convert_alpha()
-        self.image_moving = pygame.image.load("assets/player_moving.png").convert_alpha()
+        # Picks the idle or moving image when drawn
+        self.moving = False
+        # Running totals for batch statistics
+        self.damage_taken = 0
+        self.items_used = 0
 
-        # Scale images
-        self.image_idle = pygame.transform.scale(self.image_idle, (self.width, self.height))
-        self.image_moving = pygame.transform.scale(self.image_moving, (self.width, self.height))
-
-        # Set default image
-        self.image = self.image_idle
-
-    def move(self, dx, dy, obstacles):
-        if dx != 0 or dy != 0:
-            self.image = self.image_moving  # Change to moving image
-        else:
-            self.image = self.image_idle 
+    def move(self, dx, dy, world):
+        self.moving = dx != 0 or dy != 0
         # Check sprinting
         if self.sprinting and self.stamina > 0:
             dx *= self.sprint_speed / self.speed
@@ -56,38 +50,38 @@ class Player:
         new_y = self.rect.y + dy
 
         # Keep player inside the map boundaries
-        new_x = max(0, min(new_x, MAP_WIDTH - self.width))
-        new_y = max(0, min(new_y, MAP_HEIGHT - self.height))
+        new_x = max(0, min(new_x, self.map_width - self.width))
+        new_y = max(0, min(new_y, self.map_height - self.height))
 
-        new_rect = self.rect.copy()
-        new_rect.x = new_x
-        if not any(new_rect.colliderect(obstacle.rect) for obstacle in obstacles):
-             self.rect.x = new_x
-             self.x = self.rect.x
+        # Move one axis at a time so the player slides along walls
+        world.move_and_slide(self.rect, new_x - self.rect.x, new_y - self.rect.y)
+        self.x = self.rect.x
+        self.y = self.rect.y
 
-        # Test y movement (collisions)
-        new_rect = self.rect.copy()
-        new_rect.y = new_y
-        if not any(new_rect.colliderect(obstacle.rect) for obstacle in obstacles):
-           self.rect.y = new_y
-           self.y = self.rect.y
-
-    def draw(self, screen):
-        screen.blit(self.image, self.rect.topleft)
+    def draw(self, screen, offset=(0, 0)):
+        # offset is the camera position when the world scrolls
+        x, y = self.rect.x - offset[0], self.rect.y - offset[1]
+        image_path = "assets/player_moving.png" if self.moving else "assets/player_idle.png"
+        screen.blit(assets.get(image_path, (self.width, self.height)), (x, y))
         
         # Draw health bar
         health_bar_width = 40
         health_bar_height = 3
         health_ratio = self.health / self.max_health
-        pygame.draw.rect(screen, RED, (self.rect.x, self.rect.y - 10, health_bar_width, health_bar_height))
-        pygame.draw.rect(screen, GREEN, (self.rect.x, self.rect.y - 10, health_bar_width * health_ratio, health_bar_height))
+        pygame.draw.rect(screen, RED, (x, y - 10, health_bar_width, health_bar_height))
+        pygame.draw.rect(screen, GREEN, (x, y - 10, health_bar_width * health_ratio, health_bar_height))
         
         # Draw stamina bar
         stamina_ratio = self.stamina / self.max_stamina
-        pygame.draw.rect(screen, GRAY, (self.rect.x, self.rect.y - 5, health_bar_width, health_bar_height))
-        pygame.draw.rect(screen, YELLOW, (self.rect.x, self.rect.y - 5, health_bar_width * stamina_ratio, health_bar_height))
+        pygame.draw.rect(screen, GRAY, (x, y - 5, health_bar_width, health_bar_height))
+        pygame.draw.rect(screen, YELLOW, (x, y - 5, health_bar_width * stamina_ratio, health_bar_height))
+
+    def get_draw_rect(self):
+        # Sprite plus the health and stamina bars drawn above it
+        return pygame.Rect(self.rect.x, self.rect.y - 10, max(self.width, 40), self.height + 10)
 
     def take_damage(self, amount):
+        self.damage_taken += min(amount, self.health)
         self.health -= amount
         if self.health < 0:
             self.health = 0
@@ -105,6 +99,7 @@ class Player:
     def use_item(self, resource_type):
         if self.inventory[resource_type] > 0:
             self.inventory[resource_type] -= 1
+            self.items_used += 1
             return True
         return False
     
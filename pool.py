@@ -0,0 +1,20 @@
+class Pool:
+    # Free list of spare entities of one class. acquire() takes the class's
+    # constructor arguments and re-initialises a spare through its reset(),
+    # only allocating a new instance when there are none left.
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+
+    def acquire(self, *args):
+        if self.free:
+            entity = self.free.pop()
+            entity.reset(*args)
+            return entity
+        return self.cls(*args)
+
+    def release(self, entity):
+        self.free.append(entity)
+
+    def release_all(self, entities):
+        self.free.extend(entities)
@@ -0,0 +1,114 @@
+import time
+from collections import deque
+import pygame
+from settings import WHITE, GRAY, YELLOW, RED
+
+
+# Histogram bucket upper edges in milliseconds
+BUCKET_EDGES_MS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, float('inf'))
+
+
+class FrameProfiler:
+    # Rolling per-subsystem frame timings. Callers grab the profiler only when it
+    # is enabled (prof = profiler if profiler.enabled else None), so a disabled
+    # profiler costs nothing beyond a None check per section.
+    def __init__(self, window=120):
+        self.enabled = False
+        self.window = window
+        self.samples = {}  # Section name -> deque of the last `window` timings in seconds
+        self.notes = {}  # Section name -> short text shown after its time (latest tick's)
+        self.last = 0.0
+        self.font = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+
+    def begin(self):
+        self.last = time.perf_counter()
+
+    def lap(self, name):
+        # Time since the previous begin() / lap() goes to this section
+        now = time.perf_counter()
+        self.record(name, now - self.last)
+        self.last = now
+
+    def record(self, name, seconds):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def note(self, name, text):
+        self.notes[name] = text
+
+    def mean_ms(self, name):
+        samples = self.samples.get(name)
+        if not samples:
+            return 0.0
+        return sum(samples) / len(samples) * 1000
+
+    def histogram(self, name):
+        counts = [0] * len(BUCKET_EDGES_MS)
+        for seconds in self.samples.get(name, ()):
+            ms = seconds * 1000
+            for i, edge in enumerate(BUCKET_EDGES_MS):
+                if ms <= edge:
+                    counts[i] += 1
+                    break
+        return counts
+
+    def draw(self, screen, x, y, width):
+        if self.font is None:
+            self.font = pygame.font.Font(None, 16)
+
+        row_height = 13
+        bar_width = 4
+        bars_x = x + width - len(BUCKET_EDGES_MS) * bar_width
+        for name in self.samples:
+            # Section name and mean time
+            text = f"{name} {self.mean_ms(name):.2f}ms"
+            if name in self.notes:
+                text += f" {self.notes[name]}"
+            label = self.font.render(text, True, WHITE)
+            screen.blit(label, (x, y))
+
+            # Histogram of the rolling window, slow buckets in red
+            counts = self.histogram(name)
+            peak = max(counts) or 1
+            for i, count in enumerate(counts):
+                height = int((row_height - 3) * count / peak)
+                color = RED if BUCKET_EDGES_MS[i] > 8 else (YELLOW if BUCKET_EDGES_MS[i] > 1 else GRAY)
+                pygame.draw.rect(screen, color, (bars_x + i * bar_width, y + row_height - 3 - height,
+                                                 bar_width - 1, max(height, 1)))
+            y += row_height
+
+
+class StartupTimer:
+    # Where cold-start time goes. Phases on the main thread are marked as they
+    # finish, each one covering the time since the previous mark; work done on
+    # background threads overlaps them and is recorded separately.
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.last = self.start
+        self.phases = []  # (name, seconds) on the main thread, in order
+        self.background = []  # (name, seconds, finished at) from other threads
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def record(self, name, seconds):
+        # For background work and one-off steps outside the startup sequence
+        self.background.append((name, seconds, time.perf_counter() - self.start))
+
+    def report(self):
+        lines = ["Startup (ms)"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<22} {seconds * 1000:>8.1f}")
+        lines.append(f"  {'total':<22} {(self.last - self.start) * 1000:>8.1f}")
+        if self.background:
+            lines.append("Off the startup path (ms, done at)")
+            for name, seconds, finished in self.background:
+                lines.append(f"  {name:<22} {seconds * 1000:>8.1f} {finished * 1000:>8.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,93 @@
+import struct
+import sys
+import zlib
+from array import array
+from settings import MAP_WIDTH, MAP_HEIGHT
+from inputs import InputState
+
+
+MAGIC = b"ZREC"
+VERSION = 3  # 2: spawns are planned before any entity is built (worldgen), 3: noise field
+# magic, version, game seed, difficulty, map size, world size (0 x 0 for the
+# classic map), zombie / resource count overrides (-1 for the difficulty's),
+# tick count and the md5 of the final game state
+HEADER = struct.Struct("<4sHQ8sIIIIiiI16s")
+
+
+class Recording:
+    # One game session: everything needed to rebuild the starting state, plus the
+    # packed input of every tick (2 bytes each before compression)
+    def __init__(self, seed, difficulty="normal", map_size=(MAP_WIDTH, MAP_HEIGHT), world_size=None,
+                 zombie_count=None, resource_count=None):
+        self.seed = seed
+        self.difficulty = difficulty
+        self.map_size = map_size
+        self.world_size = world_size
+        self.zombie_count = zombie_count
+        self.resource_count = resource_count
+        self.inputs = array("H")
+        self.digest = bytes(16)  # State after the last tick, filled in when saved
+
+    @classmethod
+    def for_game(cls, game):
+        if game.streaming:
+            map_size, world_size = (MAP_WIDTH, MAP_HEIGHT), (game.map_width, game.map_height)
+        else:
+            map_size, world_size = (game.map_width, game.map_height), None
+        return cls(game.seed, game.difficulty, map_size, world_size,
+                   game.zombie_count, game.resource_count)
+
+    def record(self, inputs):
+        self.inputs.append(inputs.pack())
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def __iter__(self):
+        # Decoded inputs, reusing one InputState per distinct code
+        decoded = {}
+        for code in self.inputs:
+            inputs = decoded.get(code)
+            if inputs is None:
+                inputs = decoded[code] = InputState.unpack(code)
+            yield inputs
+
+    def save(self, path):
+        world_w, world_h = self.world_size or (0, 0)
+        header = HEADER.pack(
+            MAGIC, VERSION, self.seed, self.difficulty.encode("ascii"),
+            self.map_size[0], self.map_size[1], world_w, world_h,
+            -1 if self.zombie_count is None else self.zombie_count,
+            -1 if self.resource_count is None else self.resource_count,
+            len(self.inputs), self.digest)
+
+        # Stored little-endian; held keys repeat a lot, so they compress well
+        inputs = array("H", self.inputs)
+        if sys.byteorder == "big":
+            inputs.byteswap()
+        with open(path, "wb") as f:
+            f.write(header)
+            f.write(zlib.compress(inputs.tobytes(), 9))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        (magic, version, seed, difficulty, map_w, map_h, world_w, world_h,
+         zombie_count, resource_count, ticks, digest) = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Zombie Escape recording")
+        if version != VERSION:
+            raise ValueError(f"{path} is recording version {version}, expected {VERSION}")
+
+        recording = cls(seed, difficulty.rstrip(b"\0").decode("ascii"), (map_w, map_h),
+                        (world_w, world_h) if world_w else None,
+                        None if zombie_count < 0 else zombie_count,
+                        None if resource_count < 0 else resource_count)
+        recording.inputs.frombytes(zlib.decompress(data[HEADER.size:]))
+        if sys.byteorder == "big":
+            recording.inputs.byteswap()
+        if len(recording.inputs) != ticks:
+            raise ValueError(f"{path} is truncated: {len(recording.inputs)} of {ticks} ticks")
+        recording.digest = digest
+        return recording
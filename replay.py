@@ -0,0 +1,78 @@
+import argparse
+import os
+import sys
+import time
+
+# Replays never open a window or an audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from Game import Game
+from game_states import GameState
+from recording import Recording
+from snapshot import save_snapshot, load_snapshot
+
+
+def make_game(recording):
+    game = Game(recording.difficulty, headless=True, audio=False,
+                map_size=recording.map_size, world_size=recording.world_size)
+    game.zombie_count = recording.zombie_count
+    game.resource_count = recording.resource_count
+    # Recordings are made without the AI time budget, see Game.init_game
+    game.ai_budget_ms = None
+    game.state = GameState.PLAYING
+    game.init_game(recording.seed)
+    return game
+
+
+def replay(recording, profile=False, start_from=None, snapshot_at=None):
+    # Re-runs the session as fast as the CPU allows; returns (game, ticks run, seconds).
+    # start_from skips ahead to a snapshot taken during this session;
+    # snapshot_at is (tick, path) to save one on the way.
+    game = make_game(recording)
+    if start_from:
+        load_snapshot(game, start_from)
+    skip = game.time_elapsed
+    if profile:
+        game.profiler.window = max(len(recording) - skip, 1)
+        game.profiler.toggle()
+    step = game.step
+    start = time.perf_counter()
+    for tick, inputs in enumerate(recording):
+        if tick < skip:
+            continue
+        if snapshot_at and tick == snapshot_at[0]:
+            save_snapshot(game, snapshot_at[1])
+        step(inputs)
+    return game, len(recording) - skip, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded Zombie Escape session headless")
+    parser.add_argument("recording", help="file written by main.py --record")
+    parser.add_argument("--profile", action="store_true", help="print per-subsystem step timings")
+    parser.add_argument("--from", dest="start_from", metavar="SNAPSHOT",
+                        help="start from a snapshot of this session instead of the first tick")
+    parser.add_argument("--snapshot-at", nargs=2, metavar=("TICK", "PATH"),
+                        help="save a snapshot just before this tick runs")
+    args = parser.parse_args()
+
+    recording = Recording.load(args.recording)
+    snapshot_at = (int(args.snapshot_at[0]), args.snapshot_at[1]) if args.snapshot_at else None
+    game, ticks, seconds = replay(recording, args.profile, args.start_from, snapshot_at)
+    print(f"{ticks} ticks in {seconds:.3f} s ({ticks / max(seconds, 1e-9):.0f} ticks/s), "
+          f"seed {recording.seed}, final state {game.state.name}")
+
+    if args.profile:
+        for name in game.profiler.samples:
+            print(f"  {name:<16} mean {game.profiler.mean_ms(name):8.3f} ms")
+
+    if game.state_digest() != recording.digest:
+        print("MISMATCH: final state differs from the recorded session")
+        return 1
+    print("Final state matches the recording")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import pygame
+from asset_manager import assets
 
 class SafeZone:
     def __init__(self, x, y, width, height):
@@ -10,11 +11,10 @@ class SafeZone:
 
         # Load the safe zone image
         # self.image = pygame.image.load("safe_zone.png").convert_alpha()
-        self.image = pygame.image.load("assets/helicopter.png").convert_alpha()
-        
-        # Scale the image to match the safe zone size
-        self.image = pygame.transform.scale(self.image, (self.width, self.height))
+        self.image_path = "assets/helicopter.png"
 
-    def draw(self, screen):
-        screen.blit(self.image, self.rect.topleft)
+    def draw(self, screen, offset=(0, 0)):
+        # Scaled to match the safe zone size
+        screen.blit(assets.get(self.image_path, (self.width, self.height)),
+                    (self.rect.x - offset[0], self.rect.y - offset[1]))
 
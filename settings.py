@@ -11,6 +11,29 @@ TILE_SIZE = 40
 GRID_WIDTH = SCREEN_WIDTH // TILE_SIZE
 GRID_HEIGHT = SCREEN_HEIGHT // TILE_SIZE
 
+# Simulation runs at a fixed rate; rendering is capped separately
+SIM_RATE = 60  # Ticks per second
+MAX_FPS = 60
+MAX_CATCH_UP_STEPS = 5  # Most ticks run in one frame after a hitch
+
+# Size of the scrolling world used with --large-world
+WORLD_WIDTH = 8000
+WORLD_HEIGHT = 6000
+
+# Zombie and resource counts per difficulty
+DIFFICULTY_SETTINGS = {
+    "easy": {"zombies": 5, "resources": 15},
+    "normal": {"zombies": 10, "resources": 10},
+    "hard": {"zombies": 15, "resources": 7},
+}
+
+# Noise (see noise_field.NoiseField): loudness of each source, how much a cell's
+# noise fades per tick and how much is lost per cell it travels
+FLASHBANG_NOISE = 50
+TRAP_NOISE = 30
+NOISE_DECAY = 0.5
+NOISE_FALLOFF = 2.0
+
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -0,0 +1,344 @@
+import numpy as np
+from occupancy import OccupancyGrid
+from collision import CollisionWorld
+from player import Player
+from safe_zone import SafeZone
+from swarm import ZombieSwarm, ZOMBIE_TYPES
+from weather import WeatherEffects
+from game_states import GameState, ResourceType
+from terrain import OBSTACLE_TYPES
+from settings import TILE_SIZE, DIFFICULTY_SETTINGS
+
+
+MAGIC = b"ZSNP"
+VERSION = 2  # 2: the noise field replaced the global noise level
+
+# Every section is a flat little-endian array at an offset that follows from the
+# header alone, so a reader with an mmap can jump straight to any record.
+#
+#   header | player | rng state | tiles (grid_w * grid_h) | noise (grid_w * grid_h)
+#   | zombies | resources
+#   | traps | path cells | carried-over AI slots
+HEADER = np.dtype([
+    ("magic", "S4"), ("version", "<u2"), ("seed", "<u8"), ("difficulty", "S8"),
+    ("map_size", "<u4", 2), ("zombie_count", "<i4"), ("resource_count", "<i4"),  # -1: difficulty's
+    ("state", "u1"), ("time_elapsed", "<u4"), ("ai_tick", "<u4"),
+    ("weather", "S8"), ("weather_timer", "<i4"), ("fog_intensity", "<f8"),
+    ("grid_size", "<u2", 2), ("safe_zone", "<i4", 4),
+    ("zombies", "<u4"), ("resources", "<u4"), ("traps", "<u4"), ("path_cells", "<u4"), ("carry_over", "<u4"),
+    ("floats", "<u2"),  # Bit per GAME_NUMBERS entry that held a float rather than an int
+])
+PLAYER = np.dtype([
+    ("pos", "<i4", 2), ("prev_pos", "<i4", 2), ("health", "<f8"), ("stamina", "<f8"),
+    ("sprinting", "u1"), ("moving", "u1"), ("last_noise_level", "<f8"), ("noise_cooldown", "<f8"),
+    ("damage_taken", "<f8"), ("items_used", "<u4"), ("inventory", "<u4", len(ResourceType)),
+    ("floats", "<u2"),  # Bit per PLAYER_NUMBERS entry that held a float rather than an int
+])
+# Attributes that start as ints and may turn into floats; the type is kept so a
+# loaded game is exactly the game that was saved (state_digest included)
+GAME_NUMBERS = ("fog_intensity",)
+PLAYER_NUMBERS = ("health", "stamina", "last_noise_level", "noise_cooldown", "damage_taken")
+# random.Random state: the 625 words of the Mersenne Twister plus gauss_next
+RNG = np.dtype([("words", "<u4", 625), ("has_gauss", "u1"), ("gauss", "<f8")])
+# One fixed-width record per zombie; its path is path_len cells from path_start
+ZOMBIE = np.dtype([
+    ("pos", "<i4", 2), ("velocity", "<f4", 2), ("type", "u1"), ("state", "i1"), ("stun", "<i4"),
+    ("idle_direction", "i1", 2), ("markov_direction", "i1", 2), ("idle_counter", "<i4"),
+    ("has_flow_target", "u1"), ("flow_target", "<i4", 2), ("path_start", "<u4"), ("path_len", "<u4"),
+])
+RESOURCE = np.dtype([("pos", "<i4", 2), ("type", "u1")])
+TRAP = np.dtype([("pos", "<i4", 2), ("activated", "u1"), ("duration", "<i4")])
+CELL = np.dtype([("x", "<i4"), ("y", "<i4")])
+
+RESOURCE_TYPES = tuple(ResourceType)
+TILE_CODES = {name: code for code, name in OBSTACLE_TYPES.items()}
+
+
+def store_numbers(record, obj, names):
+    floats = 0
+    for bit, name in enumerate(names):
+        value = getattr(obj, name)
+        record[name] = value
+        if isinstance(value, float):
+            floats |= 1 << bit
+    record["floats"] = floats
+
+
+def restore_numbers(record, obj, names):
+    floats = int(record["floats"])
+    for bit, name in enumerate(names):
+        value = record[name].item()
+        setattr(obj, name, value if floats >> bit & 1 else int(value))
+
+
+def sections(header):
+    # (name, dtype, count, offset) of every section after the header
+    grid_w, grid_h = (int(size) for size in header["grid_size"])
+    layout = [
+        ("player", PLAYER, 1),
+        ("rng", RNG, 1),
+        ("tiles", np.dtype("u1"), grid_w * grid_h),
+        ("noise", np.dtype("<f4"), grid_w * grid_h),
+        ("zombies", ZOMBIE, int(header["zombies"])),
+        ("resources", RESOURCE, int(header["resources"])),
+        ("traps", TRAP, int(header["traps"])),
+        ("path_cells", CELL, int(header["path_cells"])),
+        ("carry_over", np.dtype("<u4"), int(header["carry_over"])),
+    ]
+    result = {}
+    offset = HEADER.itemsize
+    for name, dtype, count in layout:
+        result[name] = (dtype, count, offset)
+        offset += dtype.itemsize * count
+    return result
+
+
+def read_header(data):
+    if len(data) < HEADER.itemsize:
+        raise ValueError("snapshot is truncated")
+    header = np.frombuffer(data, HEADER, 1)[0]
+    if header["magic"] != MAGIC:
+        raise ValueError("not a Zombie Escape snapshot")
+    if header["version"] != VERSION:
+        raise ValueError(f"snapshot version {header['version']}, expected {VERSION}")
+    # Every section must lie inside the data
+    dtype, count, offset = list(sections(header).values())[-1]
+    if offset + dtype.itemsize * count > len(data):
+        raise ValueError("snapshot is truncated")
+    return header
+
+
+def read_section(data, name, header=None):
+    # Zero-copy view of one section of a snapshot held in bytes
+    if header is None:
+        header = read_header(data)
+    dtype, count, offset = sections(header)[name]
+    return np.frombuffer(data, dtype, count, offset)
+
+
+def pack(game):
+    if game.streaming:
+        raise ValueError("snapshots only cover the classic map, not the streamed world")
+    zombies = game.zombies
+    n = len(zombies)
+    paths = [cell for zombie in zombies for cell in zombie.path]
+    carry_over = [zombie.index for zombie in game.ai_scheduler.carry_over]
+
+    header = np.zeros(1, HEADER)[0]
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["seed"] = game.seed
+    header["difficulty"] = game.difficulty.encode("ascii")
+    header["map_size"] = (game.map_width, game.map_height)
+    header["zombie_count"] = -1 if game.zombie_count is None else game.zombie_count
+    header["resource_count"] = -1 if game.resource_count is None else game.resource_count
+    header["state"] = game.state.value
+    header["time_elapsed"] = game.time_elapsed
+    header["ai_tick"] = game.ai_scheduler.tick
+    header["weather"] = game.weather.encode("ascii")
+    header["weather_timer"] = game.weather_timer
+    store_numbers(header, game, GAME_NUMBERS)
+    header["grid_size"] = (game.grid.width, game.grid.height)
+    header["safe_zone"] = tuple(game.safe_zone.rect)
+    header["zombies"] = n
+    header["resources"] = len(game.resources)
+    header["traps"] = len(game.traps)
+    header["path_cells"] = len(paths)
+    header["carry_over"] = len(carry_over)
+    layout = sections(header)
+
+    player = np.zeros(1, PLAYER)[0]
+    p = game.player
+    player["pos"] = p.rect.topleft
+    player["prev_pos"] = game.player_prev_pos
+    player["sprinting"] = p.sprinting
+    player["moving"] = p.moving
+    store_numbers(player, p, PLAYER_NUMBERS)
+    player["items_used"] = p.items_used
+    player["inventory"] = [p.inventory[res_type] for res_type in RESOURCE_TYPES]
+
+    rng = np.zeros(1, RNG)[0]
+    _, words, gauss = game.rng.getstate()
+    rng["words"] = words
+    rng["has_gauss"] = gauss is not None
+    rng["gauss"] = gauss or 0.0
+
+    tiles = np.zeros((game.grid.height, game.grid.width), dtype=np.uint8)
+    for obstacle in game.obstacles:
+        tiles[obstacle.rect.y // TILE_SIZE, obstacle.rect.x // TILE_SIZE] = TILE_CODES[obstacle.type]
+
+    # Per-zombie columns come straight from the swarm arrays; only the rest
+    # needs a pass over the Zombie objects
+    swarm = game.swarm
+    records = np.zeros(n, ZOMBIE)
+    if n:
+        records["pos"] = [zombie.rect.topleft for zombie in zombies]
+        records["velocity"] = swarm.velocities[:n]
+        records["type"] = swarm.types[:n]
+        records["state"] = swarm.states[:n]
+        records["stun"] = swarm.stun_timers[:n]
+        records["idle_direction"] = [zombie.idle_direction for zombie in zombies]
+        records["markov_direction"] = [zombie.markov_direction for zombie in zombies]
+        records["idle_counter"] = [zombie.idle_counter for zombie in zombies]
+        records["has_flow_target"] = [zombie.flow_target is not None for zombie in zombies]
+        records["flow_target"] = [zombie.flow_target or (0, 0) for zombie in zombies]
+        lengths = np.array([len(zombie.path) for zombie in zombies], dtype=np.uint32)
+        records["path_len"] = lengths
+        records["path_start"] = np.cumsum(lengths) - lengths
+
+    resources = np.zeros(len(game.resources), RESOURCE)
+    if game.resources:
+        resources["pos"] = [resource.rect.topleft for resource in game.resources]
+        resources["type"] = [resource.type.value for resource in game.resources]
+    traps = np.zeros(len(game.traps), TRAP)
+    if game.traps:
+        traps["pos"] = [trap.rect.topleft for trap in game.traps]
+        traps["activated"] = [trap.activated for trap in game.traps]
+        traps["duration"] = [trap.duration for trap in game.traps]
+    cells = np.array(paths, dtype=np.int32).reshape(-1, 2)
+    path_cells = np.zeros(len(paths), CELL)
+    path_cells["x"], path_cells["y"] = cells[:, 0], cells[:, 1]
+
+    # Before the game's first tick the field has yet to pick up the grid
+    game.noise.track(game.grid)
+
+    parts = {
+        "player": player, "rng": rng, "tiles": tiles.ravel(), "noise": game.noise.levels.ravel(),
+        "zombies": records,
+        "resources": resources, "traps": traps, "path_cells": path_cells,
+        "carry_over": np.array(carry_over, dtype="<u4"),
+    }
+    chunks = [header.tobytes()]
+    for name in layout:
+        chunks.append(np.asarray(parts[name], dtype=layout[name][0]).tobytes())
+    return b"".join(chunks)
+
+
+def unpack(game, data):
+    # Puts the game in the snapshot's state. game must have the snapshot's map size.
+    # Returns the path of the recording in progress it saved first, if there was one.
+    header = read_header(data)
+    map_size = tuple(int(size) for size in header["map_size"])
+    if game.streaming or map_size != (game.map_width, game.map_height):
+        raise ValueError(f"snapshot is of a {map_size[0]}x{map_size[1]} classic map")
+
+    def section(name):
+        return read_section(data, name, header)
+
+    # Anything else that could be wrong with the file is found before the game is touched
+    state = GameState(int(header["state"]))
+    difficulty = header["difficulty"].decode("ascii")
+    if difficulty not in DIFFICULTY_SETTINGS:
+        raise ValueError(f"snapshot has an unknown difficulty {difficulty!r}")
+    weather = header["weather"].decode("ascii")
+    zombie_count = int(header["zombies"])
+    if not np.all(section("carry_over") < zombie_count):
+        raise ValueError("snapshot has carried-over AI slots past its zombies")
+    records = section("zombies")
+    if zombie_count and int((records["path_start"].astype(np.int64) + records["path_len"]).max()) > \
+            int(header["path_cells"]):
+        raise ValueError("snapshot has zombie paths past its path cells")
+    if not np.all(np.isin(section("tiles"), [0, *OBSTACLE_TYPES])):
+        raise ValueError("snapshot has unknown tile codes")
+    if not np.all(records["type"] < len(ZOMBIE_TYPES)):
+        raise ValueError("snapshot has unknown zombie types")
+    if not np.all(section("resources")["type"] < len(RESOURCE_TYPES)):
+        raise ValueError("snapshot has unknown resource types")
+
+    # A recording can't go on halfway through another game: the session so far is saved
+    saved_recording = game.save_recording()
+
+    game.seed = int(header["seed"])
+    game.difficulty = difficulty
+    game.zombie_count = None if header["zombie_count"] < 0 else int(header["zombie_count"])
+    game.resource_count = None if header["resource_count"] < 0 else int(header["resource_count"])
+    game.state = state
+    game.time_elapsed = int(header["time_elapsed"])
+    game.weather = weather
+    game.weather_timer = int(header["weather_timer"])
+    restore_numbers(header, game, GAME_NUMBERS)
+    game.weather_effects = WeatherEffects(game.seed + 1)
+
+    # Everything from the game being replaced goes back to the pools first
+    game.release_entities()
+
+    # Map
+    grid_w, grid_h = (int(size) for size in header["grid_size"])
+    tiles = section("tiles").reshape(grid_h, grid_w)
+    game.grid = OccupancyGrid(tiles != 0)
+    game.collision_world = CollisionWorld(game.grid)
+    ys, xs = np.nonzero(tiles)
+    game.obstacles = [game.obstacle_pool.acquire(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE,
+                                                 OBSTACLE_TYPES[tile])
+                      for x, y, tile in zip(xs.tolist(), ys.tolist(), tiles[ys, xs].tolist())]
+    game.safe_zone = SafeZone(*(int(v) for v in header["safe_zone"]))
+    game.noise.reset()
+    game.noise.track(game.grid)
+    game.noise.levels[:] = section("noise").reshape(grid_h, grid_w)
+
+    # Player
+    record = section("player")[0]
+    player = game.player = Player(int(record["pos"][0]), int(record["pos"][1]), map_size)
+    game.player_prev_pos = tuple(int(v) for v in record["prev_pos"])
+    player.sprinting = bool(record["sprinting"])
+    player.moving = bool(record["moving"])
+    restore_numbers(record, player, PLAYER_NUMBERS)
+    player.items_used = int(record["items_used"])
+    player.inventory = dict(zip(RESOURCE_TYPES, record["inventory"].tolist()))
+
+    # Zombies (their constructor draws from the rng, which is restored after)
+    path_cells = section("path_cells")
+    cells = list(zip(path_cells["x"].tolist(), path_cells["y"].tolist()))
+    game.swarm = ZombieSwarm(capacity=max(len(records), 16))
+    for pos, zombie_type, idle, markov, idle_counter, has_target, target, start, length in zip(
+            records["pos"].tolist(), records["type"].tolist(), records["idle_direction"].tolist(),
+            records["markov_direction"].tolist(), records["idle_counter"].tolist(),
+            records["has_flow_target"].tolist(), records["flow_target"].tolist(),
+            records["path_start"].tolist(), records["path_len"].tolist()):
+        zombie = game.zombie_pool.acquire(pos[0], pos[1], ZOMBIE_TYPES[zombie_type], game.swarm, game.rng)
+        zombie.idle_direction = tuple(idle)
+        zombie.markov_direction = tuple(markov)
+        zombie.idle_counter = idle_counter
+        zombie.flow_target = tuple(target) if has_target else None
+        zombie.path = cells[start:start + length]
+        game.zombies.append(zombie)
+    n = len(game.zombies)
+    swarm = game.swarm
+    swarm.states[:n] = records["state"]
+    swarm.stun_timers[:n] = records["stun"]
+    swarm.velocities[:n] = records["velocity"]
+
+    game.resources = [game.resource_pool.acquire(x, y, RESOURCE_TYPES[res_type]) for (x, y), res_type in
+                      zip(section("resources")["pos"].tolist(), section("resources")["type"].tolist())]
+    for (x, y), activated, duration in zip(section("traps")["pos"].tolist(),
+                                           section("traps")["activated"].tolist(),
+                                           section("traps")["duration"].tolist()):
+        trap = game.trap_pool.acquire(x, y)
+        trap.activated = bool(activated)
+        trap.duration = duration
+        game.traps.append(trap)
+
+    scheduler = game.ai_scheduler
+    scheduler.tick = int(header["ai_tick"])
+    scheduler.budget_ms = game.ai_budget_ms  # A loaded game is never recorded
+    scheduler.carry_over = [game.zombies[index] for index in section("carry_over").tolist()]
+
+    rng = section("rng")[0]
+    game.rng.setstate((3, tuple(rng["words"].tolist()), rng["gauss"].item() if rng["has_gauss"] else None))
+
+    game.update_broadphase()
+    game.background = None
+    return saved_recording
+
+
+def save_snapshot(game, path):
+    with open(path, "wb") as f:
+        f.write(pack(game))
+
+
+def load_snapshot(game, path):
+    # Read into bytes rather than mapped: the section views unpack makes (and
+    # any exception's traceback) may outlive the file, which an mmap can't
+    with open(path, "rb") as f:
+        data = f.read()
+    return unpack(game, data)
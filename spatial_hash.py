@@ -0,0 +1,100 @@
+import numpy as np
+from settings import TILE_SIZE
+
+
+EMPTY = np.zeros(0, dtype=np.intp)
+
+
+class SpatialHash:
+    # Uniform-grid broadphase over entity centers (the swarm's position array).
+    # Rebuilt once per tick with a single sort of per-cell codes; a query binary
+    # searches the codes of the few cells around it, so it costs what the local
+    # density costs. Every query returns slot indices in ascending order.
+    def __init__(self, cell_size=TILE_SIZE * 2):
+        self.cell_size = cell_size
+        self.positions = np.zeros((0, 2))
+        self.order = EMPTY  # Slot indices sorted by cell code
+        self.codes = np.zeros(0, dtype=np.int64)  # Their cell codes, ascending
+        self.bounds = None  # (min_x, min_y, max_x, max_y) of all centers, worked out on demand
+
+    @staticmethod
+    def cell_code(cx, cy):
+        # One sortable integer per cell; worlds stay far below 2**20 cells across
+        return (cx + (1 << 20)) << 21 | (cy + (1 << 20))
+
+    def build(self, positions):
+        self.positions = positions
+        self.bounds = None
+        if len(positions) == 0:
+            self.order = EMPTY
+            self.codes = np.zeros(0, dtype=np.int64)
+            return
+
+        keys = (positions // self.cell_size).astype(np.int64)
+        codes = self.cell_code(keys[:, 0], keys[:, 1])
+        # Order within a cell doesn't matter, queries sort what they return
+        self.order = np.argsort(codes)
+        self.codes = codes[self.order]
+
+    def candidates(self, left, top, right, bottom):
+        # Indices of everything centred in the cells touching this box
+        if len(self.codes) == 0:
+            return EMPTY
+        size = self.cell_size
+        cxs = np.arange(int(left // size), int(right // size) + 1)
+        cys = np.arange(int(top // size), int(bottom // size) + 1)
+        # A column's cells have consecutive codes, so one pair of binary
+        # searches per column covers all of its rows in the box
+        starts = np.searchsorted(self.codes, self.cell_code(cxs, cys[0]), "left")
+        ends = np.searchsorted(self.codes, self.cell_code(cxs, cys[-1]), "right")
+        found = [self.order[start:end] for start, end in zip(starts.tolist(), ends.tolist()) if end > start]
+        if not found:
+            return EMPTY
+        return np.sort(np.concatenate(found)) if len(found) > 1 else np.sort(found[0])
+
+    def query_radius(self, center, radius):
+        # Entities whose center is strictly inside the circle
+        x, y = center
+        indices = self.candidates(x - radius, y - radius, x + radius, y + radius)
+        if len(indices) == 0:
+            return indices
+        offsets = self.positions[indices] - center
+        return indices[np.einsum("ij,ij->i", offsets, offsets) < radius * radius]
+
+    def query_rect(self, rect, margin=0):
+        # Entities whose center is within margin of the rect: every entity of
+        # half-size <= margin that could overlap it (callers do the exact test)
+        indices = self.candidates(rect.left - margin, rect.top - margin,
+                                  rect.right + margin, rect.bottom + margin)
+        if len(indices) == 0:
+            return indices
+        centers = self.positions[indices]
+        inside = ((centers[:, 0] >= rect.left - margin) & (centers[:, 0] <= rect.right + margin) &
+                  (centers[:, 1] >= rect.top - margin) & (centers[:, 1] <= rect.bottom + margin))
+        return indices[inside]
+
+    def nearest(self, point, max_radius=None):
+        # Returns (index, distance) of the closest entity, or (None, inf). Searches
+        # growing circles, so the cost depends on how far the nearest one is.
+        if len(self.codes) == 0:
+            return None, float('inf')
+        if self.bounds is None:
+            xs, ys = self.positions[:, 0], self.positions[:, 1]
+            self.bounds = (xs.min(), ys.min(), xs.max(), ys.max())
+        x, y = point
+        min_x, min_y, max_x, max_y = self.bounds
+        # Past this radius the circle holds every entity
+        reach = np.hypot(max(x - min_x, max_x - x), max(y - min_y, max_y - y)) + 1
+
+        radius = self.cell_size
+        while True:
+            limit = radius if max_radius is None else min(radius, max_radius)
+            indices = self.query_radius(point, limit)
+            if len(indices):
+                offsets = self.positions[indices] - point
+                dist_sq = np.einsum("ij,ij->i", offsets, offsets)
+                best = int(np.argmin(dist_sq))
+                return int(indices[best]), float(np.sqrt(dist_sq[best]))
+            if limit >= reach or (max_radius is not None and limit >= max_radius):
+                return None, float('inf')
+            radius *= 2
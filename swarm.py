@@ -0,0 +1,111 @@
+import numpy as np
+from game_states import ZombieState
+
+
+# Index with a state value to get the enum back without calling ZombieState(...)
+ZOMBIE_STATES = tuple(ZombieState)
+ZOMBIE_TYPES = ("normal", "markov")
+
+
+class ZombieSwarm:
+    # Structure-of-arrays store for every zombie in a game. Zombie objects keep
+    # their rect and movement logic and read the rest through their slot index.
+    def __init__(self, capacity=16):
+        self.zombies = []
+        self.count = 0
+        self.positions = np.zeros((capacity, 2))  # Rect centers
+        self.velocities = np.zeros((capacity, 2))  # Movement since the previous sync
+        self.states = np.zeros(capacity, dtype=np.int8)
+        self.types = np.zeros(capacity, dtype=np.int8)
+        self.stun_timers = np.zeros(capacity, dtype=np.int32)
+        self.detection_radii = np.zeros(capacity)
+        self.headings = np.zeros((capacity, 2), dtype=np.int8)  # Towards louder noise, set each tick
+        self.alerted = []  # Slots that started chasing on the last update_states
+
+    def add(self, zombie, zombie_type, detection_radius):
+        if self.count == len(self.states):
+            self.grow(max(len(self.states) * 2, 1))
+
+        index = self.count
+        self.count += 1
+        self.zombies.append(zombie)
+        self.positions[index] = zombie.rect.center
+        self.velocities[index] = 0
+        self.states[index] = ZombieState.IDLE.value
+        self.types[index] = ZOMBIE_TYPES.index(zombie_type)
+        self.stun_timers[index] = 0
+        self.detection_radii[index] = detection_radius
+        self.headings[index] = 0
+        return index
+
+    def grow(self, capacity):
+        def resized(array):
+            bigger = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            bigger[:len(array)] = array
+            return bigger
+
+        self.positions = resized(self.positions)
+        self.velocities = resized(self.velocities)
+        self.states = resized(self.states)
+        self.types = resized(self.types)
+        self.stun_timers = resized(self.stun_timers)
+        self.detection_radii = resized(self.detection_radii)
+        self.headings = resized(self.headings)
+
+    def retain(self, zombies):
+        # Keep only these zombies (in this order), compacting the arrays
+        indices = np.array([zombie.index for zombie in zombies], dtype=np.intp)
+        n = len(zombies)
+        for name in ("positions", "velocities", "states", "types", "stun_timers", "detection_radii",
+                     "headings"):
+            array = getattr(self, name)
+            array[:n] = array[indices]
+        for index, zombie in enumerate(zombies):
+            zombie.index = index
+        self.zombies = list(zombies)
+        self.count = n
+
+    def sync_positions(self):
+        # Pull rect centers back in after the zombies moved
+        n = self.count
+        if n == 0:
+            return
+        centers = np.array([zombie.rect.center for zombie in self.zombies], dtype=float)
+        self.velocities[:n] = centers - self.positions[:n]
+        self.positions[:n] = centers
+
+    def update_states(self, player, noise=None):
+        # Stun countdown, detection and state changes for every zombie at once.
+        # Returns a list of flags, True for zombies that get to act this tick.
+        n = self.count
+        stun_timers = self.stun_timers[:n]
+        stunned = stun_timers > 0
+        stun_timers[stunned] -= 1
+        active = ~stunned
+
+        # What each zombie hears in its own cell of the noise field
+        if noise is not None:
+            heard, self.headings[:n] = noise.listen(self.positions[:n])
+        else:
+            heard = np.zeros(n)
+            self.headings[:n] = 0
+
+        # Check if player is within detection radius (adjusted by noise)
+        offsets = self.positions[:n] - player.rect.center
+        dist_sq = np.einsum("ij,ij->i", offsets, offsets)
+        radii = self.detection_radii[:n] + heard
+        chasing = dist_sq < radii * radii
+
+        fallback = np.where(heard > 0, ZombieState.INVESTIGATE.value, ZombieState.IDLE.value)
+        new_states = np.where(chasing, ZombieState.CHASE.value, fallback).astype(np.int8)
+
+        # Zombies dropping back to idle restart their wander timer
+        states = self.states[:n]
+        entered_idle = active & (new_states == ZombieState.IDLE.value) & (states != ZombieState.IDLE.value)
+        for index in np.flatnonzero(entered_idle):
+            self.zombies[index].idle_counter = 0
+        self.alerted = np.flatnonzero(active & (new_states == ZombieState.CHASE.value) &
+                                      (states != ZombieState.CHASE.value)).tolist()
+
+        states[active] = new_states[active]
+        return active.tolist()
@@ -0,0 +1,120 @@
+import numpy as np
+
+
+# Tile codes produced by the generator
+TILE_EMPTY = 0
+TILE_WALL = 1
+TILE_TREE = 2
+TILE_FENCE = 3
+OBSTACLE_TYPES = {TILE_WALL: "wall", TILE_TREE: "tree", TILE_FENCE: "fence"}
+
+# The 2D part of the 16 gradient directions used by noise.pnoise2
+GRADIENTS = np.array([
+    (1, 1), (-1, 1), (1, -1), (-1, -1),
+    (1, 0), (-1, 0), (1, 0), (-1, 0),
+    (0, 1), (0, -1), (0, 1), (0, -1),
+    (1, 1), (0, -1), (-1, 1), (0, -1),
+], dtype=np.float64)
+
+MASK32 = np.uint64(0xFFFFFFFF)
+
+
+def cell_random(seed, xs, ys):
+    # Uniform [0, 1) value per cell from an integer hash of (seed, x, y), so the
+    # result does not depend on how the map is split into chunks
+    h = (xs.astype(np.uint64) * np.uint64(0x9E3779B1)
+         + ys.astype(np.uint64) * np.uint64(0x85EBCA77)
+         + np.uint64(seed) * np.uint64(0xC2B2AE3D)) & MASK32
+    h ^= h >> np.uint64(16)
+    h = (h * np.uint64(0x7FEB352D)) & MASK32
+    h ^= h >> np.uint64(15)
+    h = (h * np.uint64(0x846CA68B)) & MASK32
+    h ^= h >> np.uint64(16)
+    return h / float(1 << 32)
+
+
+class TerrainGenerator:
+    def __init__(self, seed, width, height, scale=15.0, octaves=6, persistence=0.5,
+                 lacunarity=2.0, repeat=1024, wall_threshold=0.2, tree_threshold=0.3,
+                 fence_chance=0.02):
+        # width / height are the grid size the noise coordinates are normalised to,
+        # matching x / GRID_WIDTH - 0.5 in the old per-tile generator
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.octaves = octaves
+        self.persistence = persistence
+        self.lacunarity = lacunarity
+        self.repeat = repeat
+        self.wall_threshold = wall_threshold
+        self.tree_threshold = tree_threshold
+        self.fence_chance = fence_chance
+
+        # Seeded permutation table, doubled so lookups never need wrapping
+        perm = np.random.RandomState(seed).permutation(256)
+        self.perm = np.concatenate([perm, perm])
+
+    def perlin(self, x, y, repeat):
+        # Improved Perlin noise over whole arrays of sample points
+        perm = self.perm
+        xi = np.floor(np.fmod(x, repeat)).astype(np.int64)
+        yi = np.floor(np.fmod(y, repeat)).astype(np.int64)
+        xi1 = np.fmod(xi + 1, repeat).astype(np.int64) & 255
+        yi1 = np.fmod(yi + 1, repeat).astype(np.int64) & 255
+        xi &= 255
+        yi &= 255
+
+        x = x - np.floor(x)
+        y = y - np.floor(y)
+        fx = x * x * x * (x * (x * 6 - 15) + 10)
+        fy = y * y * y * (y * (y * 6 - 15) + 10)
+
+        a = perm[xi]
+        b = perm[xi1]
+
+        def grad(hashes, gx, gy):
+            g = GRADIENTS[perm[hashes] & 15]
+            return gx * g[..., 0] + gy * g[..., 1]
+
+        n00 = grad(perm[a + yi], x, y)
+        n10 = grad(perm[b + yi], x - 1, y)
+        n01 = grad(perm[a + yi1], x, y - 1)
+        n11 = grad(perm[b + yi1], x - 1, y - 1)
+
+        nx0 = n00 + fx * (n10 - n00)
+        nx1 = n01 + fx * (n11 - n01)
+        return nx0 + fy * (nx1 - nx0)
+
+    def noise_field(self, x0, y0, w, h):
+        # Fractal (octave) noise for the cells [x0, x0 + w) x [y0, y0 + h), shape (h, w)
+        xs = (np.arange(x0, x0 + w) / self.width - 0.5) * self.scale
+        ys = (np.arange(y0, y0 + h) / self.height - 0.5) * self.scale
+        x, y = np.meshgrid(xs, ys)
+
+        total = np.zeros((h, w))
+        freq = 1.0
+        amp = 1.0
+        max_amp = 0.0
+        for _ in range(self.octaves):
+            total += self.perlin(x * freq, y * freq, self.repeat * freq) * amp
+            max_amp += amp
+            freq *= self.lacunarity
+            amp *= self.persistence
+        return total / max_amp
+
+    def generate(self, x0=0, y0=0, w=None, h=None):
+        # Tile codes for a block of the map, shape (h, w)
+        w = self.width if w is None else w
+        h = self.height if h is None else h
+        values = self.noise_field(x0, y0, w, h)
+
+        tiles = np.full((h, w), TILE_EMPTY, dtype=np.int8)
+        tiles[values > self.wall_threshold] = TILE_WALL
+        tiles[values > self.tree_threshold] = TILE_TREE
+
+        # Some random fences on the open ground
+        ys, xs = np.mgrid[y0:y0 + h, x0:x0 + w]
+        fences = (values <= self.wall_threshold) & (cell_random(self.seed, xs, ys) < self.fence_chance)
+        tiles[fences] = TILE_FENCE
+        return tiles
@@ -2,13 +2,18 @@ import pygame
 from settings import TILE_SIZE, BLACK, RED
 
 class Trap:
+    __slots__ = ("rect", "activated", "duration")
+    width = TILE_SIZE // 2
+    height = TILE_SIZE // 2
+    color = (139, 69, 19)  # Brown
+    
     def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.width = TILE_SIZE // 2
-        self.height = TILE_SIZE // 2
-        self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
-        self.color = (139, 69, 19)  # Brown
+        self.rect = pygame.Rect(x, y, self.width, self.height)
+        self.reset(x, y)
+    
+    def reset(self, x, y):
+        # Re-initialise in place, for traps recycled through a Pool
+        self.rect.topleft = (x, y)
         self.activated = False
         self.duration = 300  # 5 seconds at 60 FPS
     
@@ -18,15 +23,18 @@ class Trap:
             return self.duration <= 0
         return False
     
-    def draw(self, screen):
+    def draw(self, screen, offset=(0, 0)):
+        rect = self.rect.move(-offset[0], -offset[1])
         if not self.activated:
-            pygame.draw.rect(screen, self.color, self.rect)
+            pygame.draw.rect(screen, self.color, rect)
+            # Corner to corner, staying inside the rect (the dirty-rect
+            # redraw only restores the rect)
             pygame.draw.line(screen, BLACK, 
-                            (self.rect.left, self.rect.top), 
-                            (self.rect.right, self.rect.bottom), 1)
+                            (rect.left, rect.top), 
+                            (rect.right - 1, rect.bottom - 1), 1)
             pygame.draw.line(screen, BLACK, 
-                            (self.rect.left, self.rect.bottom), 
-                            (self.rect.right, self.rect.top), 1)
+                            (rect.left, rect.bottom - 1), 
+                            (rect.right - 1, rect.top), 1)
         else:
-            pygame.draw.rect(screen, RED, self.rect, 1)
+            pygame.draw.rect(screen, RED, rect, 1)
 
@@ -0,0 +1,105 @@
+import numpy as np
+import pygame
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT
+
+
+RAIN_COLOR = (200, 200, 255)
+FOG_COLOR = (200, 200, 200)
+
+# Particle count, streak lengths, horizontal slant and fall speed per weather
+PARTICLE_STYLES = {
+    "rain": {"count": 100, "lengths": (5, 15), "slant": 2, "speed": (8, 12)},
+    "storm": {"count": 150, "lengths": (5, 20), "slant": 3, "speed": (12, 18)},
+}
+
+
+def streak_sprite(length, slant):
+    # One rain streak, (x, y) -> (x - slant, y + length) like the old draw.line
+    sprite = pygame.Surface((slant + 1, length + 1)).convert()
+    sprite.set_colorkey((0, 0, 0))
+    pygame.draw.line(sprite, RAIN_COLOR, (slant, 0), (0, length), 1)
+    return sprite
+
+
+class WeatherEffects:
+    # Screen-space weather. Rain and storm streaks are persistent particles kept
+    # in NumPy arrays and moved all at once each frame, then drawn with one
+    # Surface.blits call from pre-rendered sprites. The fog and lightning
+    # overlays are allocated once; fog is only re-tinted when its intensity changes.
+    def __init__(self, seed=None, size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        self.rng = np.random.default_rng(seed)
+        self.width, self.height = size
+        self.style = None
+        self.positions = np.zeros((0, 2))
+        self.velocities = np.zeros((0, 2))
+        self.particle_sprites = []  # Sprite per particle, fixed while the style lasts
+        self.sprites = {}  # (length, slant) -> streak sprite
+        self.fog = None
+        self.fog_alpha = None
+        self.flash = None
+
+    def set_style(self, weather):
+        # Respawn the particle pool for a new kind of precipitation
+        self.style = weather
+        style = PARTICLE_STYLES.get(weather)
+        if style is None:
+            self.positions = np.zeros((0, 2))
+            self.velocities = np.zeros((0, 2))
+            self.particle_sprites = []
+            return
+
+        count = style["count"]
+        low, high = style["lengths"]
+        slant = style["slant"]
+        lengths = self.rng.integers(low, high + 1, count)
+        speeds = self.rng.uniform(*style["speed"], count)
+        self.positions = np.column_stack([self.rng.uniform(0, self.width, count),
+                                          self.rng.uniform(0, self.height, count)])
+        # Fall along the streak's own slope
+        self.velocities = np.column_stack([-speeds * slant / lengths, speeds])
+
+        self.particle_sprites = []
+        for length in lengths.tolist():
+            sprite = self.sprites.get((length, slant))
+            if sprite is None:
+                sprite = self.sprites[(length, slant)] = streak_sprite(length, slant)
+            self.particle_sprites.append(sprite)
+
+    def update(self):
+        positions = self.positions
+        positions += self.velocities
+
+        # Streaks that left the screen start again from the top
+        gone = (positions[:, 1] > self.height) | (positions[:, 0] < 0)
+        count = int(np.count_nonzero(gone))
+        if count:
+            positions[gone, 0] = self.rng.uniform(0, self.width, count)
+            positions[gone, 1] = self.rng.uniform(-20, 0, count)
+
+    def draw(self, screen, weather, fog_intensity=0):
+        if weather != self.style:
+            self.set_style(weather)
+
+        if weather == "fog":
+            alpha = int(fog_intensity * 150)
+            if self.fog is None:
+                self.fog = pygame.Surface((self.width, self.height)).convert()
+                self.fog.fill(FOG_COLOR)
+            if alpha != self.fog_alpha:
+                self.fog.set_alpha(alpha)
+                self.fog_alpha = alpha
+            screen.blit(self.fog, (0, 0))
+            return
+
+        if not self.particle_sprites:
+            return
+        self.update()
+        screen.blits(zip(self.particle_sprites, self.positions.astype(int).tolist()), False)
+
+        # Occasional lightning flash
+        if weather == "storm" and self.rng.random() < 0.02:
+            if self.flash is None:
+                self.flash = pygame.Surface((self.width, self.height)).convert()
+                self.flash.fill((255, 255, 255))
+                self.flash.set_alpha(50)
+            screen.blit(self.flash, (0, 0))
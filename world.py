@@ -0,0 +1,149 @@
+import numpy as np
+import pygame
+from settings import TILE_SIZE, BLACK
+from collision import CollisionWorld
+from occupancy import OccupancyGrid
+from terrain import TILE_EMPTY, TILE_WALL, OBSTACLE_TYPES
+from asset_manager import assets
+
+
+class ChunkedWorld(CollisionWorld):
+    # A large world split into square chunks that are generated from the terrain
+    # seed the first time the player gets near them. Every generated chunk keeps
+    # its tile codes as a small int8 array; only chunks within load_radius of the
+    # player are "loaded" (simulated and rendered) at any time.
+    def __init__(self, terrain, width, height, chunk_size=16, load_radius=1, tile_size=TILE_SIZE):
+        self.terrain = terrain
+        self.width = width  # In tiles
+        self.height = height
+        self.tile_size = tile_size
+        self.chunk_size = chunk_size
+        self.load_radius = load_radius
+        self.chunks_x = -(-width // chunk_size)
+        self.chunks_y = -(-height // chunk_size)
+
+        self.tiles = {}  # (cx, cy) -> int8 tile codes, kept after unloading
+        self.loaded = set()
+        self.surfaces = {}  # Pre-rendered loaded chunks
+        self.cleared = set()  # Cells forced open (safe zone)
+        self.center_chunk = None
+
+        # Walkable grid around the player for the flow field (origin = its top-left cell)
+        self.window = OccupancyGrid.empty(0, 0)
+
+    def chunk_of(self, cell):
+        return (cell[0] // self.chunk_size, cell[1] // self.chunk_size)
+
+    def chunk_origin(self, key):
+        return (key[0] * self.chunk_size, key[1] * self.chunk_size)
+
+    def chunk_tiles(self, key):
+        tiles = self.tiles.get(key)
+        if tiles is None:
+            x0, y0 = self.chunk_origin(key)
+            w = min(self.chunk_size, self.width - x0)
+            h = min(self.chunk_size, self.height - y0)
+            tiles = self.terrain.generate(x0, y0, w, h)
+            for x, y in self.cleared:
+                if x0 <= x < x0 + w and y0 <= y < y0 + h:
+                    tiles[y - y0, x - x0] = TILE_EMPTY
+            self.tiles[key] = tiles
+        return tiles
+
+    def tile(self, x, y):
+        # Everything outside the world counts as wall
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return TILE_WALL
+        cs = self.chunk_size
+        return self.chunk_tiles((x // cs, y // cs))[y % cs, x % cs]
+
+    def clear(self, cells):
+        for x, y in cells:
+            self.cleared.add((x, y))
+            tiles = self.tiles.get(self.chunk_of((x, y)))
+            if tiles is not None:
+                tiles[y % self.chunk_size, x % self.chunk_size] = TILE_EMPTY
+                self.surfaces.pop(self.chunk_of((x, y)), None)
+
+    def hits(self, rect):
+        tile = self.tile_size
+        for y in range(rect.top // tile, (rect.bottom - 1) // tile + 1):
+            for x in range(rect.left // tile, (rect.right - 1) // tile + 1):
+                if self.tile(x, y):
+                    return True
+        return False
+
+    def keys_around(self, key, radius):
+        cx, cy = key
+        return [(x, y)
+                for y in range(max(cy - radius, 0), min(cy + radius, self.chunks_y - 1) + 1)
+                for x in range(max(cx - radius, 0), min(cx + radius, self.chunks_x - 1) + 1)]
+
+    def stream(self, cell):
+        # Load chunks near the player's cell, unload ones that fell well behind.
+        # Returns (newly loaded keys, unloaded keys); both empty if nothing changed.
+        key = self.chunk_of(cell)
+        if key == self.center_chunk:
+            return [], []
+        self.center_chunk = key
+
+        wanted = self.keys_around(key, self.load_radius)
+        loaded = [k for k in wanted if k not in self.loaded]
+        for k in loaded:
+            self.chunk_tiles(k)
+            self.loaded.add(k)
+
+        # One chunk of slack so walking back and forth over a border doesn't thrash
+        keep = self.load_radius + 1
+        unloaded = [k for k in self.loaded
+                    if max(abs(k[0] - key[0]), abs(k[1] - key[1])) > keep]
+        for k in unloaded:
+            self.loaded.discard(k)
+            self.surfaces.pop(k, None)
+
+        self.rebuild_window(wanted)
+        return loaded, sorted(unloaded)
+
+    def rebuild_window(self, keys):
+        cs = self.chunk_size
+        min_cx = min(k[0] for k in keys)
+        min_cy = min(k[1] for k in keys)
+        max_cx = max(k[0] for k in keys)
+        max_cy = max(k[1] for k in keys)
+        x0, y0 = min_cx * cs, min_cy * cs
+        w = min((max_cx + 1) * cs, self.width) - x0
+        h = min((max_cy + 1) * cs, self.height) - y0
+
+        window = np.ones((h, w), dtype=np.int8)
+        for key in keys:
+            tiles = self.chunk_tiles(key)
+            kx, ky = self.chunk_origin(key)
+            window[ky - y0:ky - y0 + tiles.shape[0], kx - x0:kx - x0 + tiles.shape[1]] = tiles != TILE_EMPTY
+
+        self.window = OccupancyGrid(window, (x0, y0))
+
+    def free_cells(self, key):
+        # Open cells of a chunk in world coordinates
+        x0, y0 = self.chunk_origin(key)
+        ys, xs = np.nonzero(self.chunk_tiles(key) == TILE_EMPTY)
+        return [(x0 + x, y0 + y) for x, y in zip(xs.tolist(), ys.tolist())]
+
+    def chunk_surface(self, key):
+        surface = self.surfaces.get(key)
+        if surface is None:
+            tiles = self.chunk_tiles(key)
+            tile = self.tile_size
+            surface = pygame.Surface((tiles.shape[1] * tile, tiles.shape[0] * tile)).convert()
+            surface.fill(BLACK)
+            ys, xs = np.nonzero(tiles)
+            for x, y, code in zip(xs.tolist(), ys.tolist(), tiles[ys, xs].tolist()):
+                image = assets.get(f"assets/{OBSTACLE_TYPES[code]}.png", (tile, tile))
+                surface.blit(image, (x * tile, y * tile))
+            self.surfaces[key] = surface
+        return surface
+
+    def visible_chunks(self, view_rect):
+        span = self.chunk_size * self.tile_size
+        return [(cx, cy)
+                for cy in range(max(view_rect.top // span, 0), min((view_rect.bottom - 1) // span, self.chunks_y - 1) + 1)
+                for cx in range(max(view_rect.left // span, 0), min((view_rect.right - 1) // span, self.chunks_x - 1) + 1)]
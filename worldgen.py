@@ -0,0 +1,187 @@
+import queue
+import random
+import threading
+import numpy as np
+from occupancy import OccupancyGrid
+from terrain import TerrainGenerator, TILE_EMPTY
+from game_states import ResourceType
+from settings import TILE_SIZE, DIFFICULTY_SETTINGS
+
+
+RESOURCE_TYPES = list(ResourceType)
+
+
+def generate_tiles(rng, terrain_width, grid_width, grid_height):
+    # Perlin terrain for one classic map, the whole field in one batch.
+    # Returns (terrain, tile codes); draws the terrain seed from rng.
+    seed = rng.randint(0, 1000)
+    terrain = TerrainGenerator(seed, terrain_width, grid_height)
+    return terrain, terrain.generate(0, 0, grid_width, grid_height)
+
+
+class WorldPlan:
+    # Everything init_game needs for a classic map, worked out without touching
+    # the Game: the map, where everything spawns, and the game's random stream
+    # as it stands after all of that was drawn from it
+    def __init__(self, seed, rng, terrain, tiles, grid):
+        self.seed = seed
+        self.rng = rng
+        self.terrain = terrain
+        self.tiles = tiles
+        self.grid = grid
+        self.player_pos = None
+        self.safe_pos = None
+        self.zombie_cells = grid.free_cells  # Open cells zombies may spawn on
+        self.spawn_distances = None  # BFS steps from the player's spawn
+        self.zombies = []  # (x, y, type) in pixels
+        self.resources = []  # (x, y, ResourceType) in pixels
+
+
+def random_cell(rng, grid, cells):
+    # One pick from a precomputed array of flat cell indices
+    return grid.cell_at(int(cells[rng.randrange(len(cells))]))
+
+
+def find_position_far_from_player(rng, grid, distances, map_size):
+    # Safe zone (3 tiles inside the border) among the cells the player can
+    # walk to, picked from the furthest quarter of that walk
+    distances = distances.reshape(grid.height, grid.width)
+    min_x, min_y = 3, 3
+    max_x = (map_size[0] // TILE_SIZE) - 3
+    max_y = (map_size[1] // TILE_SIZE) - 3
+    inner = distances[min_y:max_y + 1, min_x:max_x + 1]
+
+    # Fallback: If nothing inside the border is reachable, place it at the center
+    if inner.size == 0 or inner.max() < 0:
+        return ((max_x + min_x) // 2, (max_y + min_y) // 2)
+
+    ys, xs = np.nonzero(inner >= 0.75 * inner.max())
+    pick = rng.randrange(len(xs))
+    return (int(xs[pick]) + min_x, int(ys[pick]) + min_y)
+
+
+def plan_spawns(plan, map_size, num_zombies, num_resources):
+    # Fills in the plan's spawn points from its generated map
+    rng, grid = plan.rng, plan.grid
+
+    # Player starts anywhere in the biggest open area; everything else is
+    # placed from the indexes built around that spot
+    spawn_cells = grid.largest_component()
+    if len(spawn_cells) == 0:
+        spawn_cells = np.arange(grid.width * grid.height)
+    player_pos = plan.player_pos = random_cell(rng, grid, spawn_cells)
+
+    # Open cells far enough from the player for zombies, and walking distances
+    # from the player for the safe zone
+    free = grid.free_cells
+    xs, ys = free % grid.width, free // grid.width
+    far = np.hypot(xs - player_pos[0], ys - player_pos[1]) * TILE_SIZE >= 200
+    plan.zombie_cells = free[far] if far.any() else free
+    plan.spawn_distances = np.array(grid.distance_field(player_pos), dtype=np.int32)
+    plan.safe_pos = find_position_far_from_player(rng, grid, plan.spawn_distances, map_size)
+
+    for _ in range(num_zombies):
+        x, y = random_cell(rng, grid, plan.zombie_cells)
+        zombie_type = rng.choice(["normal", "normal", "markov"])  # 2/3 normal, 1/3 markov
+        plan.zombies.append((x * TILE_SIZE, y * TILE_SIZE, zombie_type))
+    for _ in range(num_resources):
+        x, y = random_cell(rng, grid, free)
+        plan.resources.append((x * TILE_SIZE, y * TILE_SIZE, rng.choice(RESOURCE_TYPES)))
+    return plan
+
+
+class WorldSpec:
+    # What a classic map depends on, apart from its seed
+    def __init__(self, map_size, terrain_width):
+        self.map_size = map_size
+        self.terrain_width = terrain_width
+        self.grid_width = map_size[0] // TILE_SIZE
+        self.grid_height = map_size[1] // TILE_SIZE
+
+    def generate(self, seed):
+        # Map only; returns (rng, terrain, tiles, grid) with rng just past the map
+        rng = random.Random(seed)
+        terrain, tiles = generate_tiles(rng, self.terrain_width, self.grid_width, self.grid_height)
+        return rng, terrain, tiles, OccupancyGrid(tiles != TILE_EMPTY)
+
+    def plan(self, seed, num_zombies, num_resources):
+        return plan_spawns(WorldPlan(seed, *self.generate(seed)), self.map_size, num_zombies, num_resources)
+
+
+class WorldPregenerator:
+    # Background thread that plans the worlds of upcoming seeds, so starting
+    # one of them is just a matter of building its entities. Every seed is
+    # planned for each (zombies, resources) count it is asked for; they share
+    # the map and differ only in spawns. A plan is identical to what
+    # WorldSpec.plan gives for the same arguments, so taking one from here
+    # doesn't change the game.
+    def __init__(self, spec, depth=2):
+        self.spec = spec
+        self.depth = depth
+        self.requests = queue.Queue()
+        self.ready = {}  # (seed, zombies, resources) -> WorldPlan
+        self.wanted = []  # Seeds still worth keeping plans for, oldest first
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name="world-pregenerator", daemon=True)
+        self.thread.start()
+
+    def request(self, seed, counts):
+        # Plan seed for every (zombies, resources) in counts, in the background
+        with self.lock:
+            if seed not in self.wanted:
+                self.wanted.append(seed)
+            # Plans for seeds that dropped out of the window are never taken
+            for old in self.wanted[:-self.depth]:
+                self.drop(old)
+            del self.wanted[:-self.depth]
+        self.requests.put((seed, counts))
+
+    def take(self, seed, num_zombies, num_resources):
+        # The finished plan, or None if it isn't ready yet. Either way the seed
+        # is done with: the caller plans it itself when nothing was ready.
+        with self.lock:
+            plan = self.ready.pop((seed, num_zombies, num_resources), None)
+            self.drop(seed)
+            if seed in self.wanted:
+                self.wanted.remove(seed)
+            return plan
+
+    def drop(self, seed):
+        for key in [key for key in self.ready if key[0] == seed]:
+            del self.ready[key]
+
+    def run(self):
+        while True:
+            seed, counts = self.requests.get()
+            with self.lock:
+                if seed not in self.wanted:
+                    continue
+            rng, terrain, tiles, grid = self.spec.generate(seed)
+            state = rng.getstate()
+            for num_zombies, num_resources in counts:
+                # Each count starts from the stream as it was right after the map
+                spawn_rng = random.Random()
+                spawn_rng.setstate(state)
+                plan = plan_spawns(WorldPlan(seed, spawn_rng, terrain, tiles, grid),
+                                   self.spec.map_size, num_zombies, num_resources)
+                with self.lock:
+                    if seed in self.wanted:
+                        self.ready[(seed, num_zombies, num_resources)] = plan
+
+
+def difficulty_counts(difficulty, zombie_count=None, resource_count=None):
+    # (zombies, resources) a game of this difficulty spawns, overrides applied.
+    # Unknown difficulties play as hard.
+    settings = DIFFICULTY_SETTINGS.get(difficulty, DIFFICULTY_SETTINGS["hard"])
+    return (settings["zombies"] if zombie_count is None else zombie_count,
+            settings["resources"] if resource_count is None else resource_count)
+
+
+def spawn_counts(zombie_count=None, resource_count=None):
+    # (zombies, resources) of every difficulty, with any overrides applied
+    counts = []
+    for difficulty in DIFFICULTY_SETTINGS:
+        pair = difficulty_counts(difficulty, zombie_count, resource_count)
+        if pair not in counts:
+            counts.append(pair)
+    return counts
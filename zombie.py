@@ -1,85 +1,139 @@
 import pygame
 import random
 import math
-from settings import TILE_SIZE, GRID_HEIGHT,RED, WHITE, YELLOW, GRID_WIDTH
+from settings import TILE_SIZE, RED, WHITE, YELLOW
 from game_states import ZombieState
 from collections import deque
+from asset_manager import assets
+from swarm import ZombieSwarm, ZOMBIE_STATES
+
+
+DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+
+def markov_weights(current):
+    # Same direction gets highest weight, the opposite one the lowest
+    weights = []
+    for dx, dy in DIRECTIONS:
+        if (dx, dy) == current:
+            weights.append(0.5)
+        elif (dx, dy) == (-current[0], -current[1]):
+            weights.append(0.1)
+        else:
+            weights.append(0.2)
+    return weights
+
+
+class ZombieKind:
+    # Everything that is the same for every zombie of one type, shared by all of them
+    __slots__ = ("name", "speed", "detection_radius", "image_path", "is_markov")
+
+    def __init__(self, name, speed, detection_radius, image_path, is_markov=False):
+        self.name = name
+        self.speed = speed
+        self.detection_radius = detection_radius
+        self.image_path = image_path
+        self.is_markov = is_markov
+
+
+ZOMBIE_KINDS = {
+    "normal": ZombieKind("normal", 2, 150, "assets/zombie.png"),
+    "markov": ZombieKind("markov", 3, 200, "assets/markov.png", is_markov=True),
+}
+# Markov turn weights for each current direction, in DIRECTIONS order
+MARKOV_WEIGHTS = {direction: markov_weights(direction) for direction in DIRECTIONS}
+STUNNED_IMAGE = "assets/people.png"
 
 
 class Zombie:
-    def __init__(self, x, y, zombie_type="normal"):
-        self.x = x
-        self.y = y
-        self.width = TILE_SIZE - 10
-        self.height = TILE_SIZE - 10
-        self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
-        self.type = zombie_type
-        self.state = ZombieState.IDLE
-        self.speed = 2 if zombie_type == "normal" else 3
-        self.detection_radius = 150 if zombie_type == "normal" else 200
-        self.target_x = None
-        self.target_y = None
+    # Per-zombie data only: per-type constants live in the shared ZombieKind,
+    # and state, stun timer and detection radius in the swarm's arrays
+    __slots__ = ("rect", "kind", "swarm", "index", "rng", "path", "flow_target",
+                 "idle_counter", "idle_direction", "markov_direction")
+    width = TILE_SIZE - 10
+    height = TILE_SIZE - 10
+    idle_direction_change_prob = 0.05
+    direction_change_prob = 0.2
+    
+    def __init__(self, x, y, zombie_type="normal", swarm=None, rng=None):
+        self.rect = pygame.Rect(x, y, self.width, self.height)
+        self.reset(x, y, zombie_type, swarm, rng)
+    
+    def reset(self, x, y, zombie_type="normal", swarm=None, rng=None):
+        # Re-initialise in place, for zombies recycled through a Pool
+        self.rect.topleft = (x, y)
+        self.kind = ZOMBIE_KINDS[zombie_type]
+        self.swarm = swarm if swarm is not None else ZombieSwarm(capacity=1)
+        self.index = self.swarm.add(self, zombie_type, self.kind.detection_radius)
+        # Random stream for wandering; the game passes its own so runs can be replayed
+        self.rng = rng if rng is not None else random
         self.path = []
+        self.flow_target = None
         self.idle_counter = 0
-        self.idle_direction = random.choice([(1, 0), (0, 1), (-1, 0), (0, -1)])
-        self.idle_direction_change_prob = 0.05
-        self.is_stunned = False
-        self.stun_time = 0
-        # self.color = RED if zombie_type == "normal" else (200, 0, 0)
-         # Load zombie images
-        self.image_normal = pygame.image.load("assets/zombie.png").convert_alpha()
-        self.image_stunned = pygame.image.load("assets/people.png").convert_alpha()
-        self.image_markov = pygame.image.load("assets/markov.png").convert_alpha()
-        self.image_normal = pygame.transform.scale(self.image_normal, (self.width, self.height))
-        self.image_stunned = pygame.transform.scale(self.image_stunned, (self.width, self.height))
-        self.image_markov = pygame.transform.scale(self.image_markov, (self.width, self.height))
-        # For Markov chain-based zombies
-        self.is_markov = (zombie_type == "markov")
-        self.markov_direction = random.choice([(1, 0), (0, 1), (-1, 0), (0, -1)])
-        self.direction_change_prob = 0.2
-        
-    def update(self, player, obstacles, grid, noise_level=0):
-        if self.is_stunned:
-            self.stun_time -= 1
-            if self.stun_time <= 0:
-                self.is_stunned = False
+        self.idle_direction = self.rng.choice(DIRECTIONS)
+        self.markov_direction = self.rng.choice(DIRECTIONS)
+    
+    @property
+    def type(self):
+        return self.kind.name
+    
+    @property
+    def speed(self):
+        return self.kind.speed
+    
+    @property
+    def is_markov(self):
+        return self.kind.is_markov
+        
+    @property
+    def state(self):
+        return ZOMBIE_STATES[self.swarm.states[self.index]]
+    
+    @state.setter
+    def state(self, value):
+        self.swarm.states[self.index] = value.value
+    
+    @property
+    def stun_time(self):
+        return int(self.swarm.stun_timers[self.index])
+    
+    @stun_time.setter
+    def stun_time(self, value):
+        self.swarm.stun_timers[self.index] = value
+    
+    @property
+    def is_stunned(self):
+        return bool(self.swarm.stun_timers[self.index] > 0)
+    
+    @property
+    def detection_radius(self):
+        return float(self.swarm.detection_radii[self.index])
+    
+    def act(self, player, world, grid, flow_field=None):
+        # Behaviour for the current state (ZombieSwarm.update_states sets it in bulk)
+        state = self.state
+        if state == ZombieState.CHASE:
+            # With a shared flow field the path is read from the field while moving
+            if flow_field is None:
+                self.find_path_to_player(self.get_grid_pos(), player.get_grid_pos(), grid)
             return
         
-        player_pos = player.get_grid_pos()
-        zombie_grid_pos = (int(self.rect.centerx // TILE_SIZE), int(self.rect.centery // TILE_SIZE))
-        
-        # Check if player is within detection radius
-        dist_to_player = math.sqrt((self.rect.centerx - player.rect.centerx)**2 + 
-                                  (self.rect.centery - player.rect.centery)**2)
-        
-        # Adjust detection based on noise level
-        effective_detection_radius = self.detection_radius + noise_level + player.last_noise_level
-        
-        if dist_to_player < effective_detection_radius:
-            self.state = ZombieState.CHASE
-            self.find_path_to_player(zombie_grid_pos, player_pos, grid)
-        elif noise_level > 0 or player.last_noise_level > 0:
-            self.state = ZombieState.INVESTIGATE
-            # Move towards the player's general direction
-            if random.random() < 0.7:  # 70% chance to move towards noise
-                dx = 1 if player.rect.centerx > self.rect.centerx else -1
-                dy = 1 if player.rect.centery > self.rect.centery else -1
-                self.move_in_direction(dx, dy, obstacles)
+        self.flow_target = None
+        if state == ZombieState.INVESTIGATE:
+            # Move towards the louder neighbouring cell, around walls rather than through them
+            dx, dy = self.swarm.headings[self.index].tolist()
+            if self.rng.random() < 0.7 and (dx or dy):  # 70% chance to move towards noise
+                self.move_in_direction(dx, dy, world)
             else:
-                self.random_movement(obstacles)
+                self.random_movement(world)
+        elif self.is_markov:
+            self.markov_movement(world)
         else:
-            # If not chasing, go back to idle state
-            if self.state != ZombieState.IDLE:
-                self.state = ZombieState.IDLE
-                self.idle_counter = 0
-            
-            if self.is_markov:
-                self.markov_movement(obstacles)
-            else:
-                self.idle_movement(obstacles)
+            self.idle_movement(world)
     
     def find_path_to_player(self, start, goal, grid):
         # Breadth-First Search implementation
+        blocked = grid.blocked
         queue = deque([start])
         visited = {start: None}
         
@@ -101,147 +155,131 @@ class Zombie:
                 nx, ny = current[0] + dx, current[1] + dy
                 
                 # Check if in bounds and walkable
-                if (0 <= nx < GRID_WIDTH and 0 <= ny < GRID_HEIGHT and 
-                    (nx, ny) not in visited and grid[ny][nx] == 0):
+                if (nx, ny) not in visited and not blocked(nx, ny):
                     queue.append((nx, ny))
                     visited[(nx, ny)] = current
         
         # If no path found, clear the path
         self.path = []
     
-    def follow_path(self, obstacles):
+    def follow_path(self, world):
         if not self.path:
             return
             
-        next_pos = self.path[0]
-        target_x = next_pos[0] * TILE_SIZE + TILE_SIZE // 2
-        target_y = next_pos[1] * TILE_SIZE + TILE_SIZE // 2
+        # Check if reached the next point in path
+        if self.move_towards_cell(self.path[0], world):
+            self.path.pop(0)
+    
+    def follow_flow(self, flow_field, world):
+        # Pick the next cell down the gradient once the previous one is reached
+        if self.flow_target is None:
+            self.flow_target = flow_field.next_cell(self.get_grid_pos())
+            if self.flow_target is None:
+                return
+        
+        if self.move_towards_cell(self.flow_target, world):
+            self.flow_target = None
+    
+    def move_towards_cell(self, cell, world):
+        target_x = cell[0] * TILE_SIZE + TILE_SIZE // 2
+        target_y = cell[1] * TILE_SIZE + TILE_SIZE // 2
         
         dx = target_x - self.rect.centerx
         dy = target_y - self.rect.centery
         
         # Normalize direction
+        speed = self.kind.speed
         dist = math.sqrt(dx*dx + dy*dy)
         if dist > 0:
-            dx = dx / dist * self.speed
-            dy = dy / dist * self.speed
-        
-        # Move zombie
-        new_rect = self.rect.copy()
-        new_rect.x += dx
-        if not any(new_rect.colliderect(obstacle.rect) for obstacle in obstacles):
-            self.rect.x += dx
+            dx = dx / dist * speed
+            dy = dy / dist * speed
         
-        new_rect = self.rect.copy()
-        new_rect.y += dy
-        if not any(new_rect.colliderect(obstacle.rect) for obstacle in obstacles):
-            self.rect.y += dy
+        # Move zombie, sliding along walls
+        world.move_and_slide(self.rect, dx, dy)
         
-        # Check if reached the next point in path
-        if abs(self.rect.centerx - target_x) < self.speed and abs(self.rect.centery - target_y) < self.speed:
-            self.path.pop(0)
+        return abs(self.rect.centerx - target_x) < speed and abs(self.rect.centery - target_y) < speed
     
-    def idle_movement(self, obstacles):
+    def idle_movement(self, world):
         self.idle_counter += 1
         
         # Change direction randomly
-        if self.idle_counter > 60 or random.random() < self.idle_direction_change_prob:
-            self.idle_direction = random.choice([(1, 0), (0, 1), (-1, 0), (0, -1)])
+        if self.idle_counter > 60 or self.rng.random() < self.idle_direction_change_prob:
+            self.idle_direction = self.rng.choice(DIRECTIONS)
             self.idle_counter = 0
         
         dx, dy = self.idle_direction
         dx *= self.speed / 2  # Slower in idle
         dy *= self.speed / 2
         
-        self.move_in_direction(dx, dy, obstacles)
+        self.move_in_direction(dx, dy, world)
     
-    def markov_movement(self, obstacles):
-        if random.random() < self.direction_change_prob:
+    def markov_movement(self, world):
+        if self.rng.random() < self.direction_change_prob:
             # Higher chance to maintain general direction
-            current_dx, current_dy = self.markov_direction
-            directions = [(1, 0), (0, 1), (-1, 0), (0, -1)]
-            
-            weights = []
-            for dx, dy in directions:
-                # Same direction gets highest weight
-                if (dx, dy) == (current_dx, current_dy):
-                    weights.append(0.5)
-                # Opposite direction gets lowest weight
-                elif (dx, dy) == (-current_dx, -current_dy):
-                    weights.append(0.1)
-                # Other directions get medium weight
-                else:
-                    weights.append(0.2)
-            
-            self.markov_direction = random.choices(directions, weights=weights, k=1)[0]
+            weights = MARKOV_WEIGHTS[self.markov_direction]
+            self.markov_direction = self.rng.choices(DIRECTIONS, weights=weights, k=1)[0]
         
         dx, dy = self.markov_direction
         dx *= self.speed / 1.5  # Slightly faster than idle
         dy *= self.speed / 1.5
         
-        self.move_in_direction(dx, dy, obstacles)
+        self.move_in_direction(dx, dy, world)
     
-    def move_in_direction(self, dx, dy, obstacles):
-        # Test x movement
-        new_rect = self.rect.copy()
-        new_rect.x += dx
-        if not any(new_rect.colliderect(obstacle.rect) for obstacle in obstacles):
-            self.rect.x += dx
-        else:
+    def move_in_direction(self, dx, dy, world):
+        blocked_x, blocked_y = world.move_and_slide(self.rect, dx, dy)
+        
+        if blocked_x:
             # If blocked in x direction, try random new direction
             if self.is_markov:
-                self.markov_direction = random.choice([(0, 1), (0, -1)])
+                self.markov_direction = self.rng.choice([(0, 1), (0, -1)])
             else:
-                self.idle_direction = random.choice([(0, 1), (0, -1)])
+                self.idle_direction = self.rng.choice([(0, 1), (0, -1)])
         
-        # Test y movement
-        new_rect = self.rect.copy()
-        new_rect.y += dy
-        if not any(new_rect.colliderect(obstacle.rect) for obstacle in obstacles):
-            self.rect.y += dy
-        else:
+        if blocked_y:
             if self.is_markov:
-                self.markov_direction = random.choice([(1, 0), (-1, 0)])
+                self.markov_direction = self.rng.choice([(1, 0), (-1, 0)])
             else:
-                self.idle_direction = random.choice([(1, 0), (-1, 0)])
+                self.idle_direction = self.rng.choice([(1, 0), (-1, 0)])
     
-    def random_movement(self, obstacles):
-        dx = random.choice([-1, 0, 1]) * self.speed
-        dy = random.choice([-1, 0, 1]) * self.speed
-        self.move_in_direction(dx, dy, obstacles)
+    def random_movement(self, world):
+        dx = self.rng.choice([-1, 0, 1]) * self.speed
+        dy = self.rng.choice([-1, 0, 1]) * self.speed
+        self.move_in_direction(dx, dy, world)
     
-    def draw(self, screen):
-        if self.is_stunned:
-           zombie_image = self.image_stunned
-        elif self.is_markov:
-           zombie_image = self.image_markov
-        else:
-           zombie_image = self.image_normal
+    def draw(self, screen, offset=(0, 0)):
+        x, y = self.rect.x - offset[0], self.rect.y - offset[1]
+        center = (self.rect.centerx - offset[0], self.rect.centery - offset[1])
+        image_path = STUNNED_IMAGE if self.is_stunned else self.kind.image_path
     
-    # Draw the selected zombie image
-        screen.blit(zombie_image, self.rect.topleft)
+    # Draw the selected zombie image from the shared asset cache
+        screen.blit(assets.get(image_path, (self.width, self.height)), (x, y))
         
         # Draw state indicator
         if self.state == ZombieState.CHASE:
-            pygame.draw.circle(screen, RED, (self.rect.centerx, self.rect.centery), 5)
+            pygame.draw.circle(screen, RED, center, 5)
         elif self.state == ZombieState.INVESTIGATE:
-            pygame.draw.circle(screen, YELLOW, (self.rect.centerx, self.rect.centery), 5)
+            pygame.draw.circle(screen, YELLOW, center, 5)
         
         # Draw stunned indicator
         if self.is_stunned:
-            pygame.draw.circle(screen, WHITE, (self.rect.centerx, self.rect.centery), 10, 2)
+            pygame.draw.circle(screen, WHITE, center, 10, 2)
+    
+    def get_grid_pos(self):
+        return (int(self.rect.centerx // TILE_SIZE), int(self.rect.centery // TILE_SIZE))
     
     def stun(self, duration):
-        self.is_stunned = True
         self.stun_time = duration
     
-    def update_movement(self, player, obstacles, grid):
+    def update_movement(self, player, world, grid, flow_field=None):
         if self.state == ZombieState.CHASE:
-            self.follow_path(obstacles)
+            if flow_field is not None:
+                self.follow_flow(flow_field, world)
+            else:
+                self.follow_path(world)
         elif self.state == ZombieState.INVESTIGATE:
-            # Already handled in the update method
+            # Investigating zombies move when they act
             pass
         elif self.is_markov:
-            self.markov_movement(obstacles)
+            self.markov_movement(world)
         else:
-            self.idle_movement(obstacles)
+            self.idle_movement(world)